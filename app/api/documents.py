@@ -1,34 +1,15 @@
 import json
-import httpx
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from pydantic import BaseModel
 from typing import Optional
 
 from app.db.session import get_session
-from app.db.models import Document, Citizen, Requirement
+from app.services import document_service
+from app.services.document_service import DocumentServiceError
 
 router = APIRouter()
 
-TESSERACT_LAMBDA_URL = "https://cwtrytr9te.execute-api.ap-south-1.amazonaws.com/upload"
-
-
-def _build_rag_json(requirement_name: str, doc_type_slug: str, ocr_text: str) -> dict:
-    """
-    Converts raw OCR text into a structured JSON payload ready for RAG compliance assessment.
-    Format: {requirement_name: {doc_type, raw_text, summary_lines}}
-    """
-    lines = [l.strip() for l in ocr_text.splitlines() if l.strip()]
-    return {
-        requirement_name: {
-            "doc_type": doc_type_slug,
-            "raw_text": ocr_text,
-            "summary_lines": lines[:30],
-            "char_count": len(ocr_text)
-        }
-    }
-
 
 @router.post("/upload")
 async def upload_document(
@@ -42,87 +23,19 @@ async def upload_document(
     - Saves a Document record with status='processing' and the returned job_id.
     - Returns job_id so the client can correlate the webhook callback.
     """
-    citizen_result = await db.execute(
-        select(Citizen).where(Citizen.aadhar_number == citizen_aadhar)
-    )
-    citizen = citizen_result.scalars().first()
+    citizen = await document_service.get_citizen_by_aadhar(db, citizen_aadhar)
     if not citizen:
         raise HTTPException(status_code=404, detail=f"Citizen {citizen_aadhar} not found.")
 
-    req_result = await db.execute(
-        select(Requirement).where(Requirement.id == requirement_id)
-    )
-    requirement = req_result.scalars().first()
-    if not requirement:
-        raise HTTPException(status_code=404, detail=f"Requirement {requirement_id} not found.")
-
-    existing = await db.execute(
-        select(Document).where(
-            Document.citizen_id == citizen.id,
-            Document.requirement_id == requirement_id,
-            Document.status == "completed"
-        )
-    )
-    existing_doc = existing.scalars().first()
-    if existing_doc:
-        return {
-            "already_exists": True,
-            "job_id": existing_doc.job_id,
-            "file_url": existing_doc.file_url,
-            "status": existing_doc.status,
-            "message": f"'{requirement.name}' already uploaded and processed for this citizen."
-        }
-
     file_bytes = await file.read()
     filename = file.filename or f"upload_{requirement_id}.pdf"
 
     print(f"DEBUG upload: file_size={len(file_bytes)}, filename={filename}, content_type={file.content_type}")
 
-    if len(file_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            TESSERACT_LAMBDA_URL,
-            headers={
-                "x-filename": filename,
-                "Content-Type": "application/pdf"
-            },
-            content=file_bytes
-        )
-
-    if response.status_code != 200:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Tesseract Lambda error: {response.text[:200]}"
-        )
-
-    ocr_response = response.json()
-    job_id = ocr_response.get("job_id")
-    s3_url = ocr_response.get("s3_url")
-    s3_key = ocr_response.get("s3_key")
-
-    doc = Document(
-        citizen_id=citizen.id,
-        requirement_id=requirement_id,
-        document_name=requirement.name,
-        job_id=job_id,
-        s3_key=s3_key,
-        file_url=s3_url,
-        status="processing"
-    )
-    db.add(doc)
-    await db.commit()
-    await db.refresh(doc)
-
-    return {
-        "already_exists": False,
-        "document_id": doc.id,
-        "job_id": job_id,
-        "s3_url": s3_url,
-        "status": "processing",
-        "message": "File uploaded. OCR in progress. Await webhook callback."
-    }
+    try:
+        return await document_service.upload_document(db, citizen, requirement_id, file_bytes, filename)
+    except DocumentServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 
 class OCRWebhookPayload(BaseModel):
@@ -135,22 +48,6 @@ class OCRWebhookPayload(BaseModel):
     error_message: Optional[str] = None
 
 
-async def _resolve_document(db: AsyncSession, payload: OCRWebhookPayload):
-    """Find Document by job_id first, then by s3_key if present (for webhooks that send hash as job_id)."""
-    result = await db.execute(
-        select(Document).where(Document.job_id == payload.job_id)
-    )
-    doc = result.scalars().first()
-    if doc:
-        return doc
-    if payload.s3_key:
-        result = await db.execute(
-            select(Document).where(Document.s3_key == payload.s3_key)
-        )
-        doc = result.scalars().first()
-    return doc
-
-
 @router.post("/webhook")
 async def ocr_webhook(payload: OCRWebhookPayload, db: AsyncSession = Depends(get_session)):
     """
@@ -158,40 +55,19 @@ async def ocr_webhook(payload: OCRWebhookPayload, db: AsyncSession = Depends(get
     Document to know which requirement's transcript to save.
     Accepts both ocr_text and text; normalizes status 'success' -> 'completed'.
     """
-    doc = await _resolve_document(db, payload)
+    doc = await document_service.resolve_document(db, payload.job_id, payload.s3_key)
     if not doc:
         raise HTTPException(
             status_code=404,
             detail=f"No document found for job_id '{payload.job_id}'."
         )
 
-    status = payload.status.strip().lower()
-    if status == "success":
-        status = "completed"
-    doc.status = status
-
-    ocr_text = payload.ocr_text or payload.text or ""
-    if status == "completed" and ocr_text:
-        req_result = await db.execute(
-            select(Requirement).where(Requirement.id == doc.requirement_id)
-        )
-        req = req_result.scalars().first()
-
-        doc_type_slug = ""
-        if req and req.doc_type:
-            doc_type_slug = req.doc_type.slug
-
-        rag_json = _build_rag_json(
-            requirement_name=doc.document_name,
-            doc_type_slug=doc_type_slug,
-            ocr_text=ocr_text
-        )
-        doc.ocr_summary = json.dumps(rag_json)
-
-    elif status == "failed":
-        doc.ocr_summary = json.dumps({"error": payload.error_message or "OCR failed."})
-
-    await db.commit()
+    status = await document_service.apply_ocr_result(
+        db, doc,
+        status=payload.status,
+        ocr_text=payload.ocr_text or payload.text or "",
+        error_message=payload.error_message,
+    )
 
     return {
         "status": "received",
@@ -206,10 +82,7 @@ async def get_document_status(job_id: str, db: AsyncSession = Depends(get_sessio
     """
     Poll endpoint — check OCR status and retrieve the RAG summary once completed.
     """
-    result = await db.execute(
-        select(Document).where(Document.job_id == job_id)
-    )
-    doc = result.scalars().first()
+    doc = await document_service.get_document_by_job_id(db, job_id)
     if not doc:
         raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
 
@@ -229,17 +102,11 @@ async def get_citizen_documents(citizen_aadhar: str, db: AsyncSession = Depends(
     Returns all documents uploaded by a citizen, with their OCR status.
     Used by vault_tool to check what's already been processed.
     """
-    citizen_result = await db.execute(
-        select(Citizen).where(Citizen.aadhar_number == citizen_aadhar)
-    )
-    citizen = citizen_result.scalars().first()
+    citizen = await document_service.get_citizen_by_aadhar(db, citizen_aadhar)
     if not citizen:
         raise HTTPException(status_code=404, detail="Citizen not found.")
 
-    docs_result = await db.execute(
-        select(Document).where(Document.citizen_id == citizen.id)
-    )
-    docs = docs_result.scalars().all()
+    docs = await document_service.list_citizen_documents(db, citizen.id)
 
     return [
         {
@@ -0,0 +1,56 @@
+import json
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core.progress import progress_bus
+from app.db.models import StatusTracking
+from app.db.session import async_session
+
+router = APIRouter()
+
+
+async def _tracking_exists(tracking_id: int) -> bool:
+    """A stream is only opened for ids with recent events or a StatusTracking row."""
+    if progress_bus.history(tracking_id):
+        return True
+    async with async_session() as db:
+        return await db.get(StatusTracking, tracking_id) is not None
+
+
+@router.get("/progress/{tracking_id}")
+async def stream_progress_sse(tracking_id: int):
+    """
+    Server-Sent Events stream of structured progress events for a tracking id.
+    The stream closes after the pipeline's terminal completed/failed event, or once
+    it has been idle for IDLE_TIMEOUT seconds. Unknown tracking ids get a 404.
+    """
+    if not await _tracking_exists(tracking_id):
+        raise HTTPException(status_code=404, detail="Tracking record not found.")
+
+    async def event_stream():
+        async for event in progress_bus.subscribe(tracking_id):
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/progress/{tracking_id}/ws")
+async def stream_progress_ws(websocket: WebSocket, tracking_id: int):
+    """
+    WebSocket variant of the progress stream; sends one JSON message per event.
+    Unknown tracking ids are closed with code 4404.
+    """
+    await websocket.accept()
+    if not await _tracking_exists(tracking_id):
+        await websocket.close(code=4404, reason="Tracking record not found.")
+        return
+    try:
+        async for event in progress_bus.subscribe(tracking_id):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -1,19 +1,106 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from datetime import timedelta
+import asyncio
 import json
 
 from app.api.schemas import SubmitRequest, SubmitResponse, RequirementIn, DocumentTypeIn
-from app.db.session import get_session
+from app.db.session import get_session, async_session
 from app.db.models import Citizen, Employee, Requirement, StatusTracking, DocumentType
 from app.tools.vault_tool import vault_tool
 from app.tools.explanation_tool import explanation_tool
+from app.core.jobs import job_queue
+from app.core.progress import emit_progress, PIPELINE_AGENT
+from app.core.compliance_cache import compliance_cache
+from app.core.llm import get_llm_limiter
+from app.core.retriever import embedding_batcher
+from app.core.retrieval_cache import retrieval_cache
+from app.core.config import settings
 
 router = APIRouter()
 
 
-@router.post("/submit", response_model=SubmitResponse)
+SHUTDOWN_REMARKS = "Pipeline interrupted by server shutdown. Please resubmit."
+
+
+async def _mark_failed(tracking_id: int, remarks: str):
+    async with async_session() as db:
+        tracking = await db.get(StatusTracking, tracking_id)
+        tracking.status = "failed"
+        tracking.remarks = remarks
+        await db.commit()
+
+
+async def _run_submission(tracking_id: int, state: dict):
+    """Runs the vault + compliance pipeline for a queued submission and persists the result."""
+    async with async_session() as db:
+        tracking = await db.get(StatusTracking, tracking_id)
+        tracking.status = "processing"
+        await db.commit()
+    emit_progress(state, PIPELINE_AGENT, "Pipeline started.")
+
+    try:
+        state = await vault_tool(state)
+        state = await explanation_tool(state)
+    except asyncio.CancelledError:
+        # Cancelled by JobQueue.stop() at shutdown: don't leave the row in "processing"
+        await _mark_failed(tracking_id, SHUTDOWN_REMARKS)
+        emit_progress(state, PIPELINE_AGENT, "Pipeline interrupted by server shutdown.", "failed")
+        raise
+    except Exception as e:
+        await _mark_failed(tracking_id, f"Pipeline error: {str(e)[:200]}")
+        emit_progress(state, PIPELINE_AGENT, f"Pipeline failed: {str(e)[:200]}", "failed")
+        raise
+
+    async with async_session() as db:
+        tracking = await db.get(StatusTracking, tracking_id)
+        tracking.status = "in_review"
+        tracking.vault_summary = json.dumps(state.get("vault_summaries", {}))
+        tracking.compliance_notes = json.dumps(state.get("compliance_report", {}))
+        await db.commit()
+    emit_progress(state, PIPELINE_AGENT, "Pipeline complete. Request is in review.", "completed",
+                  {"status": "in_review"})
+
+
+async def fail_dropped_submissions(jobs):
+    """Marks submissions that were still queued when JobQueue.stop() gave up as failed."""
+    for fn, args in jobs:
+        if fn is not _run_submission:
+            continue
+        tracking_id, state = args
+        await _mark_failed(tracking_id, SHUTDOWN_REMARKS)
+        emit_progress(state, PIPELINE_AGENT, "Pipeline interrupted by server shutdown.", "failed")
+
+
+async def recover_stale_submissions() -> int:
+    """
+    Fails pending/processing rows untouched for SUBMIT_STALE_SECONDS: their process crashed
+    or was killed before it could settle them. The age threshold leaves rows that another
+    live worker is still running alone.
+    """
+    async with async_session() as db:
+        result = await db.execute(
+            update(StatusTracking)
+            .where(
+                StatusTracking.status.in_(("pending", "processing")),
+                StatusTracking.updated_at < func.current_timestamp() - timedelta(seconds=settings.SUBMIT_STALE_SECONDS),
+            )
+            .values(status="failed", remarks="Pipeline was interrupted (server restarted). Please resubmit.")
+        )
+        await db.commit()
+    return result.rowcount
+
+
+@router.post("/submit", response_model=SubmitResponse, status_code=202)
 async def submit_document_request(request: SubmitRequest, db: AsyncSession = Depends(get_session)):
+    """
+    Creates the StatusTracking row and queues the vault/compliance pipeline on the
+    background worker pool. Poll GET /tracking/{tracking_id} for the result.
+    """
+    if job_queue.full():
+        raise HTTPException(status_code=503, detail="Submission queue is full. Please retry shortly.")
+
     citizen_result = await db.execute(
         select(Citizen).where(Citizen.aadhar_number == request.aadhar_number)
     )
@@ -32,7 +119,7 @@ async def submit_document_request(request: SubmitRequest, db: AsyncSession = Dep
         status="pending"
     )
     db.add(tracking)
-    await db.flush()
+    await db.commit()
 
     state = {
         "aadhar_number": request.aadhar_number,
@@ -56,22 +143,19 @@ async def submit_document_request(request: SubmitRequest, db: AsyncSession = Dep
         "progress_log": ["Request initiated."]
     }
 
-    state = await vault_tool(state)
-    state = await explanation_tool(state)
-
-    compliance_json = json.dumps(state.get("compliance_report", {}))
-    vault_json = json.dumps(state.get("vault_summaries", {}))
-
-    tracking.status = "in_review"
-    tracking.vault_summary = vault_json
-    tracking.compliance_notes = compliance_json
-    await db.commit()
+    try:
+        job_queue.submit(_run_submission, tracking.id, state)
+    except asyncio.QueueFull:
+        tracking.status = "failed"
+        tracking.remarks = "Submission queue was full."
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Submission queue is full. Please retry shortly.")
 
+    emit_progress(state, PIPELINE_AGENT, "Request queued.", "pending")
     return SubmitResponse(
         tracking_id=tracking.id,
-        status="in_review",
-        message="Document request submitted and processed successfully.",
-        compliance_report=state.get("compliance_report", {})
+        status="pending",
+        message="Document request accepted. Stream /progress/{tracking_id} or poll /tracking/{tracking_id} for the result."
     )
 
 
@@ -103,6 +187,21 @@ async def list_tracking(db: AsyncSession = Depends(get_session)):
     ]
 
 
+@router.get("/tracking/{tracking_id}")
+async def get_tracking(tracking_id: int, db: AsyncSession = Depends(get_session)):
+    record = await db.get(StatusTracking, tracking_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Tracking record not found.")
+    return {
+        "id": record.id, "citizen_id": record.citizen_id, "employee_id": record.employee_id,
+        "document_request_type": record.document_request_type, "status": record.status,
+        "remarks": record.remarks,
+        "vault_summaries": json.loads(record.vault_summary) if record.vault_summary else None,
+        "compliance_report": json.loads(record.compliance_notes) if record.compliance_notes else None,
+        "created_at": str(record.created_at), "updated_at": str(record.updated_at)
+    }
+
+
 @router.patch("/tracking/{tracking_id}/status")
 async def update_tracking_status(tracking_id: int, payload: dict, db: AsyncSession = Depends(get_session)):
     result = await db.execute(select(StatusTracking).where(StatusTracking.id == tracking_id))
@@ -119,6 +218,26 @@ async def update_tracking_status(tracking_id: int, payload: dict, db: AsyncSessi
     return {"tracking_id": tracking_id, "status": record.status}
 
 
+@router.get("/metrics/compliance-cache")
+async def compliance_cache_metrics():
+    return compliance_cache.stats()
+
+
+@router.get("/metrics/retrieval-cache")
+async def retrieval_cache_metrics():
+    return retrieval_cache.stats()
+
+
+@router.get("/metrics/llm")
+async def llm_metrics():
+    return get_llm_limiter().stats()
+
+
+@router.get("/metrics/embeddings")
+async def embedding_metrics():
+    return embedding_batcher.stats()
+
+
 @router.get("/document-types")
 async def list_document_types(db: AsyncSession = Depends(get_session)):
     result = await db.execute(select(DocumentType))
@@ -5,7 +5,6 @@ import httpx
 from app.db.session import get_session
 from app.db.models import Document
 from app.api.schemas import BlueprintAnalysisRequest, BlueprintVerificationResult
-from app.core.bedrock import analyze_blueprint_image, analyze_blueprint_pdf
 
 router = APIRouter()
 
@@ -37,6 +36,9 @@ async def analyze_blueprint(request: BlueprintAnalysisRequest, db: AsyncSession
     is_pdf = doc.file_url.lower().endswith('.pdf') or response.headers.get("Content-Type", "").startswith("application/pdf")
     
     try:
+        # boto3 / instructor are only imported once a blueprint is actually analyzed
+        from app.core.bedrock import analyze_blueprint_image, analyze_blueprint_pdf
+
         # 4. Invoke Bedrock Vision Model via Instructor
         if is_pdf:
             analysis_result = analyze_blueprint_pdf(file_bytes, request.prompt)
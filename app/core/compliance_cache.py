@@ -0,0 +1,97 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models import ComplianceCache
+from app.db.session import async_session
+
+
+def make_compliance_key(
+    requirement_name: str,
+    summary: str,
+    scheme_id: Optional[str],
+    model_name: str,
+    corpus_version: int,
+) -> str:
+    """Cache key covering everything that can change a compliance verdict."""
+    summary_hash = hashlib.sha256(summary.encode("utf-8")).hexdigest()
+    raw = json.dumps([requirement_name, summary_hash, scheme_id or "", model_name, corpus_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ComplianceVerdictCache:
+    """
+    Two-level cache of compliance verdicts: an in-memory LRU in front of the
+    compliance_cache table. A hit skips both regulation retrieval and the LLM call.
+    """
+
+    def __init__(self, maxsize: int):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        remaining = []
+        for key in keys:
+            verdict = self.memory.get(key)
+            if verdict is not None:
+                found[key] = verdict
+            else:
+                remaining.append(key)
+
+        if remaining:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(ComplianceCache.cache_key, ComplianceCache.verdict_json)
+                    .where(ComplianceCache.cache_key.in_(remaining))
+                )
+                rows = result.fetchall()
+            for key, verdict_json in rows:
+                verdict = json.loads(verdict_json)
+                self.memory.set(key, verdict)
+                found[key] = verdict
+            self.db_hits += len(rows)
+            self.misses += len(remaining) - len(rows)
+
+        return found
+
+    async def put_many(self, entries: List[Dict[str, Any]]):
+        """entries: dicts with cache_key, requirement_name, scheme_id, model_name, corpus_version, verdict."""
+        if not entries:
+            return
+        for entry in entries:
+            self.memory.set(entry["cache_key"], entry["verdict"])
+
+        rows = [
+            {
+                "cache_key": e["cache_key"],
+                "requirement_name": e["requirement_name"],
+                "scheme_id": e["scheme_id"],
+                "model_name": e["model_name"],
+                "corpus_version": e["corpus_version"],
+                "verdict_json": json.dumps(e["verdict"]),
+            }
+            for e in entries
+        ]
+        async with async_session() as db:
+            await db.execute(insert(ComplianceCache).values(rows).on_conflict_do_nothing())
+            await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.db_hits + self.misses
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+compliance_cache = ComplianceVerdictCache(maxsize=settings.COMPLIANCE_CACHE_SIZE)
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -7,6 +8,77 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     LLM_MODEL: str = "openrouter/auto"
 
+    # Provider-wide LLM limits (0 tokens/minute disables the token budget)
+    LLM_MAX_IN_FLIGHT: int = 4
+    LLM_TOKENS_PER_MINUTE: int = 60000
+    LLM_TIMEOUT: float = 60.0
+    LLM_HTTP2: bool = True
+
+    # Background pipeline workers for POST /submit
+    SUBMIT_WORKERS: int = 4
+    SUBMIT_QUEUE_SIZE: int = 100
+    # seconds queued/running pipelines get to finish on shutdown before they are cancelled
+    SUBMIT_DRAIN_TIMEOUT: float = 30.0
+    # pending/processing rows untouched this long at startup were left by a crashed or killed
+    # process and are marked failed
+    SUBMIT_STALE_SECONDS: int = 3600
+
+    # Concurrent requirement processing in vault_tool (process-wide)
+    VAULT_CONCURRENCY: int = 8
+    VAULT_OCR_MODE_CONCURRENCY: Dict[str, int] = {"tesseract": 8, "llm_vision": 2}
+
+    # Warm the embedding model, LLM client and graph in the background at startup (gates /ready)
+    WARMUP_ON_STARTUP: bool = True
+
+    # Embedding backend: "huggingface" (sentence-transformers / PyTorch) or "onnx" (ONNX Runtime).
+    # EMBEDDING_ONNX_FILE is a local path or a file in the model's Hub repo (int8 exports work too).
+    EMBEDDING_BACKEND: str = "huggingface"
+    EMBEDDING_ONNX_FILE: str = "onnx/model.onnx"
+    EMBEDDING_ONNX_THREADS: Optional[int] = None
+
+    # Micro-batching window for query embeddings (app/core/retriever.py)
+    EMBED_BATCH_WINDOW_MS: float = 5.0
+    EMBED_BATCH_MAX_SIZE: int = 64
+    EMBED_CACHE_SIZE: int = 4096
+    EMBED_CACHE_TTL: float = 3600.0
+
+    # Default per-query ANN search knobs (None keeps the pgvector defaults)
+    VECTOR_EF_SEARCH: Optional[int] = None
+    VECTOR_PROBES: Optional[int] = None
+
+    # Retrieval backend: "pgvector" (SQL) or "numpy" (in-process mmap snapshot)
+    RETRIEVER_BACKEND: str = "pgvector"
+    VECTOR_SNAPSHOT_DIR: str = ".vector_index"
+    VECTOR_INDEX_REFRESH_SECONDS: float = 30.0
+    VECTOR_CONTENT_CACHE_SIZE: int = 1024
+
+    # Retrieval mode: "vector" or "hybrid" (full-text + vector, reciprocal-rank fusion)
+    RETRIEVAL_MODE: str = "vector"
+    HYBRID_CANDIDATES: int = 50
+    RRF_K: int = 60
+
+    # Vector-mode search column: "none" (float32), "half" (halfvec) or "bit" (binary-quantized);
+    # quantized searches re-rank RERANK_CANDIDATES rows by exact float distance
+    VECTOR_QUANTIZATION: str = "none"
+    RERANK_CANDIDATES: int = 100
+
+    # Context packing: fetch CONTEXT_FETCH_FACTOR x top_k chunks, drop near-duplicates,
+    # MMR-select within CONTEXT_TOKEN_BUDGET tiktoken tokens (0 = no limit), stitch adjacent chunks
+    CONTEXT_PACKING: bool = True
+    CONTEXT_FETCH_FACTOR: int = 2
+    CONTEXT_TOKEN_BUDGET: int = 600
+    CONTEXT_MMR_LAMBDA: float = 0.7
+    CONTEXT_DEDUP_THRESHOLD: float = 0.95
+
+    # Retrieved-context cache: in-memory LRU, optionally backed by the retrieval_cache table.
+    # The corpus version it is keyed by is re-read at most every RETRIEVAL_CACHE_VERSION_CHECK_SECONDS.
+    RETRIEVAL_CACHE_SIZE: int = 1024
+    RETRIEVAL_CACHE_DB: bool = False
+    RETRIEVAL_CACHE_VERSION_CHECK_SECONDS: float = 5.0
+
+    # In-memory LRU in front of the compliance_cache table
+    COMPLIANCE_CACHE_SIZE: int = 2048
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
@@ -0,0 +1,139 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Overlap lengths (in characters) recognized when stitching adjacent chunks; shorter
+# matches are treated as coincidence.
+MIN_STITCH_OVERLAP = 10
+MAX_STITCH_OVERLAP = 200
+# Rough chars-per-token of English text, used when the tiktoken encoding can't be loaded
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def load_tokenizer() -> bool:
+    """
+    Loads tiktoken's cl100k_base encoding (downloaded on first use, hence warmed at startup).
+    A failure is remembered, and token counts fall back to a character estimate.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken cl100k_base unavailable ({e}); estimating tokens from characters")
+            _encoding = False
+    return _encoding is not False
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens for text, measured with tiktoken's cl100k_base encoding."""
+    if not load_tokenizer():
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if not load_tokenizer():
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def make_chunk(content: str, metadata_json: Optional[str], embedding: Any) -> Dict[str, Any]:
+    """Normalizes a retrieved policy_document row for pack_context."""
+    try:
+        metadata = json.loads(metadata_json) if metadata_json else {}
+    except ValueError:
+        metadata = {}
+    vector = np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+    if vector is not None:
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+    return {
+        "content": content,
+        "source": metadata.get("source"),
+        "chunk": metadata.get("chunk"),
+        "vector": vector,
+    }
+
+
+def _similarity(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    if a is None or b is None:
+        return 0.0
+    return float(a @ b)
+
+
+def _stitch(left: str, right: str) -> str:
+    """Joins two consecutive chunks of one file, dropping the text they share."""
+    for size in range(min(len(left), len(right), MAX_STITCH_OVERLAP), MIN_STITCH_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + "\n" + right
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    query_vector: Any,
+    max_chunks: int,
+    token_budget: int,
+    mmr_lambda: float,
+    dedupe_threshold: float,
+) -> str:
+    """
+    Assembles retrieved chunks (in retrieval order) into one context string:
+    near-duplicates (cosine >= dedupe_threshold) are dropped, up to max_chunks are picked
+    by maximal marginal relevance while they fit token_budget (the first pick is always
+    kept, truncated to the budget if needed), and chunks that are consecutive in the
+    same source file are stitched back together without their overlap.
+    Groups keep the order of their best-ranked chunk.
+    """
+    query = np.asarray(query_vector, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    query = query / norm if norm else query
+
+    candidates: List[Dict[str, Any]] = []
+    seen_texts = set()
+    for rank, chunk in enumerate(chunks):
+        text = " ".join(chunk["content"].split())
+        if text in seen_texts or any(
+            _similarity(chunk["vector"], kept["vector"]) >= dedupe_threshold for kept in candidates
+        ):
+            continue
+        seen_texts.add(text)
+        candidates.append({**chunk, "rank": rank, "relevance": _similarity(query, chunk["vector"])})
+
+    selected: List[Dict[str, Any]] = []
+    used_tokens = 0
+    while candidates and len(selected) < max_chunks:
+        best_index = max(range(len(candidates)), key=lambda i: mmr_lambda * candidates[i]["relevance"] - (
+            1 - mmr_lambda
+        ) * max((_similarity(candidates[i]["vector"], s["vector"]) for s in selected), default=0.0))
+        best = candidates.pop(best_index)
+        tokens = count_tokens(best["content"])
+        if token_budget and used_tokens + tokens > token_budget:
+            if selected:
+                continue
+            # Never return an empty context: cut the best chunk down to the budget instead
+            best = {**best, "content": truncate_to_tokens(best["content"], token_budget)}
+            tokens = token_budget
+        used_tokens += tokens
+        selected.append(best)
+
+    groups: List[Dict[str, Any]] = []
+    for chunk in sorted(selected, key=lambda c: (c["source"] or "", c["chunk"] if c["chunk"] is not None else -1)):
+        last = groups[-1] if groups else None
+        if (
+            last is not None and chunk["source"] is not None and chunk["chunk"] is not None
+            and last["source"] == chunk["source"] and last["chunk"] is not None
+            and chunk["chunk"] == last["chunk"] + 1
+        ):
+            last["content"] = _stitch(last["content"], chunk["content"])
+            last["chunk"] = chunk["chunk"]
+            last["rank"] = min(last["rank"], chunk["rank"])
+        else:
+            groups.append(dict(chunk))
+    groups.sort(key=lambda g: g["rank"])
+    return "\n\n".join(g["content"] for g in groups)
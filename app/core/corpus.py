@@ -0,0 +1,30 @@
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PolicyCorpusVersion
+
+CORPUS_VERSION_ROW_ID = 1
+
+
+async def get_corpus_version(db: AsyncSession) -> int:
+    """Current policy-corpus version; 0 until ingest_policies.py has run once."""
+    result = await db.execute(
+        select(PolicyCorpusVersion.version).where(PolicyCorpusVersion.id == CORPUS_VERSION_ROW_ID)
+    )
+    version = result.scalar()
+    return version or 0
+
+
+async def bump_corpus_version(db: AsyncSession) -> int:
+    """
+    Increments the policy-corpus version after the policy_document table changes,
+    invalidating every cache keyed by it. Caller commits.
+    """
+    result = await db.execute(text("""
+        INSERT INTO policy_corpus_version (id, version)
+        VALUES (:id, 1)
+        ON CONFLICT (id) DO UPDATE
+        SET version = policy_corpus_version.version + 1, updated_at = CURRENT_TIMESTAMP
+        RETURNING version
+    """), {"id": CORPUS_VERSION_ROW_ID})
+    return result.scalar()
@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# all-MiniLM-L6-v2 is trained on (and truncated by sentence-transformers to) 256 tokens.
+EMBEDDING_MAX_TOKENS = 256
+EMBEDDING_BACKENDS = ("huggingface", "onnx")
+
+
+class OnnxEmbeddings:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime: tokenizers + one InferenceSession, mean pooling over
+    the attention mask and L2 normalization, i.e. the same pipeline sentence-transformers
+    runs, so vectors stay compatible with the already-ingested Vector(384) column.
+    Needs only onnxruntime, tokenizers and huggingface_hub (no PyTorch).
+
+    onnx_file is either a local .onnx path or a file inside the model's Hub repo
+    (e.g. "onnx/model.onnx", or an int8 export such as "onnx/model_qint8_avx512_vnni.onnx").
+    """
+
+    def __init__(self, model_name: str, onnx_file: str, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        model_path = Path(onnx_file)
+        if not model_path.exists():
+            model_path = Path(hf_hub_download(model_name, onnx_file))
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=EMBEDDING_MAX_TOKENS)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_embeddings_model(backend: Optional[str] = None):
+    """
+    Builds the embedding model for EMBEDDING_BACKEND. Both backends expose
+    embed_documents / embed_query; heavy imports happen only for the selected one.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        return OnnxEmbeddings(EMBEDDING_MODEL_NAME, settings.EMBEDDING_ONNX_FILE, settings.EMBEDDING_ONNX_THREADS)
+    if backend == "huggingface":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    raise ValueError(f"Unsupported embedding backend '{backend}'. Use one of: {', '.join(EMBEDDING_BACKENDS)}")
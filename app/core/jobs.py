@@ -0,0 +1,80 @@
+import asyncio
+import traceback
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class JobQueue:
+    """
+    Bounded in-process worker pool for long-running pipeline jobs.
+
+    Jobs are queued with submit() and executed by a fixed number of worker tasks,
+    so throughput is limited by SUBMIT_WORKERS rather than by open HTTP connections.
+    submit() raises asyncio.QueueFull when SUBMIT_QUEUE_SIZE jobs are already waiting
+    or the queue is shutting down.
+    """
+
+    def __init__(self, workers: int, maxsize: int):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 0) -> List[Tuple[Callable[..., Awaitable[Any]], tuple]]:
+        """
+        Stops accepting jobs and gives queued and running ones up to timeout seconds to
+        finish; workers still busy after that are cancelled (jobs see CancelledError).
+        Returns the (fn, args) of queued jobs that never started, for the caller to settle.
+        """
+        self._closing = True
+        if self._queue is not None and self._tasks and timeout > 0:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                print(f"JobQueue: jobs still running after {timeout}s "
+                      f"({self._queue.qsize()} not started); cancelling")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        dropped = []
+        while self._queue is not None and not self._queue.empty():
+            dropped.append(self._queue.get_nowait())
+        self._tasks = []
+        self._queue = None
+        return dropped
+
+    def full(self) -> bool:
+        return self._queue is None or self._closing or self._queue.full()
+
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args: Any):
+        if self._queue is None:
+            raise RuntimeError("JobQueue has not been started.")
+        if self._closing:
+            raise asyncio.QueueFull
+        self._queue.put_nowait((fn, args))
+
+    async def _worker(self, index: int):
+        while True:
+            fn, args = await self._queue.get()
+            try:
+                await fn(*args)
+            except Exception:
+                print(f"JobQueue worker {index}: job {getattr(fn, '__name__', fn)} failed")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+
+job_queue = JobQueue(workers=settings.SUBMIT_WORKERS, maxsize=settings.SUBMIT_QUEUE_SIZE)
@@ -1,17 +1,152 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
 from langchain_openai import ChatOpenAI
 from app.core.config import settings
 
-def get_llm():
+OPENROUTER_PROVIDER = "openrouter"
+
+
+_llm: Optional[ChatOpenAI] = None
+
+
+def get_llm() -> ChatOpenAI:
     """
-    Returns a configured LangChain ChatOpenAI instance 
+    Returns the process-wide LangChain ChatOpenAI instance
     pointing to OpenRouter to use Mistral 7B (or whichever model is configured).
+
+    The client is created lazily on first use and shares pooled keep-alive (HTTP/2)
+    connections across calls, so only the first request pays the TLS handshake.
     """
-    return ChatOpenAI(
-        model=settings.LLM_MODEL,
-        api_key=settings.OPENROUTER_API_KEY,
-        openai_api_base="https://openrouter.ai/api/v1",
-        default_headers={
-            "HTTP-Referer": "http://localhost:8000",
-            "X-Title": "SaarthiAI",
+    global _llm
+    if _llm is None:
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_IN_FLIGHT * 2,
+            max_keepalive_connections=settings.LLM_MAX_IN_FLIGHT,
+        )
+        _llm = ChatOpenAI(
+            model=settings.LLM_MODEL,
+            api_key=settings.OPENROUTER_API_KEY,
+            openai_api_base="https://openrouter.ai/api/v1",
+            timeout=settings.LLM_TIMEOUT,
+            http_client=httpx.Client(http2=settings.LLM_HTTP2, limits=limits),
+            http_async_client=httpx.AsyncClient(http2=settings.LLM_HTTP2, limits=limits),
+            default_headers={
+                "HTTP-Referer": "http://localhost:8000",
+                "X-Title": "SaarthiAI",
+            }
+        )
+    return _llm
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-size estimate (~4 characters per token) used for rate limiting."""
+    return max(1, len(text) // 4)
+
+
+class LLMRateLimiter:
+    """
+    Per-provider limiter for LLM calls: caps in-flight requests with a semaphore and
+    spends a tokens-per-minute budget from a token bucket that refills continuously.
+    Records how long calls queue for a slot versus how long generation takes.
+    """
+
+    def __init__(self, max_in_flight: int, tokens_per_minute: int):
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_generation = 0.0
+        self.max_generation = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._updated) * self.tokens_per_minute / 60.0
+        )
+        self._updated = now
+
+    async def _spend(self, tokens: int):
+        # A single call larger than the whole budget only waits for a full bucket.
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                deficit = tokens - self._tokens
+                await asyncio.sleep(deficit * 60.0 / self.tokens_per_minute)
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 1):
+        queued_at = time.monotonic()
+        async with self._semaphore:
+            if self.tokens_per_minute > 0:
+                await self._spend(estimated_tokens)
+            started_at = time.monotonic()
+            wait = started_at - queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                generation = time.monotonic() - started_at
+                self.calls += 1
+                self.total_generation += generation
+                self.max_generation = max(self.max_generation, generation)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "tokens_per_minute": self.tokens_per_minute,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "avg_queue_wait_s": round(self.total_wait / self.calls, 4) if self.calls else 0.0,
+            "max_queue_wait_s": round(self.max_wait, 4),
+            "avg_generation_s": round(self.total_generation / self.calls, 4) if self.calls else 0.0,
+            "max_generation_s": round(self.max_generation, 4),
         }
-    )
+
+
+_limiters: Dict[str, LLMRateLimiter] = {}
+
+
+def get_llm_limiter(provider: Optional[str] = None) -> LLMRateLimiter:
+    """Returns the process-wide limiter for provider (defaults to OpenRouter)."""
+    provider = provider or OPENROUTER_PROVIDER
+    if provider not in _limiters:
+        _limiters[provider] = LLMRateLimiter(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        )
+    return _limiters[provider]
+
+
+async def ainvoke_limited(runnable, inputs: Dict[str, Any], estimated_tokens: int = 1,
+                          provider: Optional[str] = None):
+    """
+    Invokes a LangChain runnable (prompt | llm) through the provider limiter with the
+    per-call LLM_TIMEOUT. Raises asyncio.TimeoutError when the call takes longer.
+    """
+    limiter = get_llm_limiter(provider)
+    async with limiter.acquire(estimated_tokens):
+        try:
+            return await asyncio.wait_for(runnable.ainvoke(inputs), settings.LLM_TIMEOUT)
+        except asyncio.TimeoutError:
+            limiter.timeouts += 1
+            raise
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pg_listener import pg_listener
+
+OCR_NOTIFY_CHANNEL = "ocr_completed"
+
+
+class OcrWaiters:
+    """
+    Wakes tasks waiting on an OCR job as soon as its webhook lands.
+
+    Waiters register an asyncio future keyed by job_id. The webhook issues pg_notify inside
+    its transaction and resolves local futures once it has committed; waiters on other
+    uvicorn workers or nodes, which LISTEN on OCR_NOTIFY_CHANNEL, are woken by the NOTIFY.
+    """
+
+    def __init__(self):
+        self._futures: Dict[str, Set[asyncio.Future]] = defaultdict(set)
+
+    def register(self, job_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._futures[job_id].add(future)
+        return future
+
+    def unregister(self, job_id: str, future: asyncio.Future):
+        waiters = self._futures.get(job_id)
+        if waiters is None:
+            return
+        waiters.discard(future)
+        if not waiters:
+            self._futures.pop(job_id, None)
+
+    def resolve(self, job_id: str, status: str):
+        for future in self._futures.get(job_id, ()):
+            if not future.done():
+                future.set_result(status)
+
+    async def notify(self, db: AsyncSession, job_id: str, status: str):
+        """
+        Queues the cross-process completion signal for job_id. Must be called inside the
+        webhook's transaction: Postgres only delivers the NOTIFY once that transaction
+        commits. Local waiters are woken by the LISTEN callback or by calling resolve()
+        after the commit, never before, so they cannot re-read an uncommitted row.
+        """
+        payload = json.dumps({"job_id": job_id, "status": status})
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                         {"channel": OCR_NOTIFY_CHANNEL, "payload": payload})
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> Optional[str]:
+        """Waits for a registered future; returns the status or None on timeout."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        self.resolve(data.get("job_id", ""), data.get("status", ""))
+
+    async def start_listener(self):
+        """
+        LISTENs for cross-process OCR notifications on the shared pg_listener connection,
+        which reconnects when dropped. Waiters also re-read their row periodically, so a
+        gap only delays them.
+        """
+        await pg_listener.add_channel(OCR_NOTIFY_CHANNEL, self._on_notification)
+        await pg_listener.start()
+
+    async def stop_listener(self):
+        await pg_listener.stop()
+
+
+ocr_waiters = OcrWaiters()
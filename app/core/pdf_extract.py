@@ -0,0 +1,54 @@
+import asyncio
+import math
+import os
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Every task re-opens the PDF, so ranges shorter than this cost more in parsing than they save.
+MIN_PAGES_PER_TASK = 4
+
+
+def default_workers() -> int:
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def count_pages(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Runs in a worker process: extracts pages [start, stop) of one PDF.
+    Returns (page_number, text, error) per page, so one broken page does not lose the range.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    pages = []
+    for number in range(start, stop):
+        try:
+            pages.append((number, reader.pages[number].extract_text() or "", None))
+        except Exception as e:
+            pages.append((number, None, f"{type(e).__name__}: {e}"))
+    return pages
+
+
+async def extract_pdf_pages(path: Path, executor: Executor, workers: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Extracts a PDF with its page ranges spread over executor (a ProcessPoolExecutor),
+    returning (page_number, text, error) for every page in page order.
+    """
+    loop = asyncio.get_running_loop()
+    total = await loop.run_in_executor(executor, count_pages, str(path))
+    if not total:
+        return []
+    per_task = max(MIN_PAGES_PER_TASK, math.ceil(total / (workers * 2)))
+    ranges = await asyncio.gather(*(
+        loop.run_in_executor(executor, extract_page_range, str(path), start, min(start + per_task, total))
+        for start in range(0, total, per_task)
+    ))
+    return [page for pages in ranges for page in pages]
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import engine
+
+# The LISTEN connection is pinged this often; a dead one is replaced with backoff up to the max
+LISTEN_HEALTH_INTERVAL = 30.0
+LISTEN_RECONNECT_MAX_DELAY = 30.0
+
+
+class PgListener:
+    """
+    One dedicated connection per process that LISTENs on every registered Postgres NOTIFY
+    channel. A supervisor task pings it and reconnects with backoff whenever it is dropped
+    (idle timeouts, restarts), re-subscribing all channels. Needs a direct (session-mode)
+    database URL: transaction-pooled pgbouncer does not support LISTEN.
+    """
+
+    def __init__(self):
+        self._callbacks: Dict[str, Callable] = {}
+        self._conn: Optional[AsyncConnection] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._lost: Optional[asyncio.Event] = None
+
+    async def add_channel(self, channel: str, callback: Callable):
+        """Registers callback(connection, pid, channel, payload) for channel, now and after reconnects."""
+        self._callbacks[channel] = callback
+        if self._conn is None:
+            return
+        try:
+            driver = (await self._conn.get_raw_connection()).driver_connection
+            await driver.add_listener(channel, callback)
+        except Exception:
+            # The supervisor reconnects and subscribes every registered channel
+            self._lost.set()
+
+    async def start(self):
+        if self._supervisor is not None:
+            return
+        self._lost = asyncio.Event()
+        self._supervisor = asyncio.create_task(self._supervise(), name="pg-listener")
+
+    async def _connect(self):
+        self._lost.clear()
+        self._conn = await engine.connect()
+        driver = (await self._conn.get_raw_connection()).driver_connection
+        driver.add_termination_listener(self._on_termination)
+        for channel, callback in self._callbacks.items():
+            await driver.add_listener(channel, callback)
+        return driver
+
+    def _on_termination(self, connection):
+        self._lost.set()
+
+    async def _supervise(self):
+        delay = 1.0
+        while True:
+            try:
+                driver = await self._connect()
+                delay = 1.0
+                while True:
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), LISTEN_HEALTH_INTERVAL)
+                        raise ConnectionError("connection terminated")
+                    except asyncio.TimeoutError:
+                        await driver.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Postgres LISTEN connection lost ({type(e).__name__}: {e}); reconnecting in {delay:.0f}s")
+                await self._close(invalidate=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LISTEN_RECONNECT_MAX_DELAY)
+
+    async def _close(self, invalidate: bool = False):
+        """Releases the LISTEN connection; a broken one is invalidated instead of pooled."""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if invalidate:
+                await conn.invalidate()
+            else:
+                driver = (await conn.get_raw_connection()).driver_connection
+                for channel, callback in self._callbacks.items():
+                    await driver.remove_listener(channel, callback)
+                driver.remove_termination_listener(self._on_termination)
+        except Exception:
+            pass
+        finally:
+            await conn.close()
+
+    async def stop(self):
+        if self._supervisor is None:
+            return
+        self._supervisor.cancel()
+        await asyncio.gather(self._supervisor, return_exceptions=True)
+        self._supervisor = None
+        await self._close()
+
+
+pg_listener = PgListener()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from sqlalchemy import text
+
+from app.core.pg_listener import pg_listener
+from app.db.session import engine
+
+ALLOWED_STATES = ("pending", "in_progress", "completed", "failed")
+SUBSCRIBER_QUEUE_SIZE = 100
+HISTORY_SIZE = 200
+HISTORY_TTL = 300
+# Streams with no event for this long are closed (lost pipeline, or ended on another worker)
+IDLE_TIMEOUT = 300
+PIPELINE_AGENT = "pipeline"
+# Events are fanned out to the other uvicorn workers / nodes over this NOTIFY channel
+PROGRESS_NOTIFY_CHANNEL = "progress_events"
+# pg_notify rejects payloads of 8000 bytes or more; larger events are sent without their detail
+MAX_NOTIFY_PAYLOAD = 7900
+OUTBOX_SIZE = 1000
+
+NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+
+class ProgressBus:
+    """
+    In-process pub/sub for structured progress events (see docs/PROGRESS_TRACKING_SPEC.md).
+
+    Each subscriber gets its own bounded queue; when a slow subscriber's queue is full the
+    oldest event is dropped so publishers never block. A short per-tracking history is kept
+    (for HISTORY_TTL seconds after the terminal event) so a client that connects
+    mid-pipeline still receives the earlier events.
+
+    With start_fanout(), published events are also sent over PROGRESS_NOTIFY_CHANNEL and
+    events from other processes are delivered locally, so a stream can be served by any
+    uvicorn worker or node, not only the one running the pipeline.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, history_size: int = HISTORY_SIZE,
+                 history_ttl: float = HISTORY_TTL, idle_timeout: float = IDLE_TIMEOUT):
+        self.queue_size = queue_size
+        self.history_size = history_size
+        self.history_ttl = history_ttl
+        self.idle_timeout = idle_timeout
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._history: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._origin = uuid.uuid4().hex
+        self._outbox: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    def publish(self, tracking_id: int, event: Dict[str, Any]):
+        self._deliver(tracking_id, event)
+        if self._outbox is not None:
+            if self._outbox.full():
+                self._outbox.get_nowait()
+            self._outbox.put_nowait((tracking_id, event))
+
+    def _deliver(self, tracking_id: int, event: Dict[str, Any]):
+        history = self._history.setdefault(tracking_id, deque(maxlen=self.history_size))
+        history.append(event)
+        for queue in self._subscribers.get(tracking_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        if _is_terminal(event):
+            asyncio.get_running_loop().call_later(self.history_ttl, self.clear, tracking_id)
+
+    async def start_fanout(self):
+        if self._sender is not None:
+            return
+        self._outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self._sender = asyncio.create_task(self._send_loop(), name="progress-fanout")
+        await pg_listener.add_channel(PROGRESS_NOTIFY_CHANNEL, self._on_notification)
+        await pg_listener.start()
+
+    async def stop_fanout(self):
+        if self._sender is None:
+            return
+        self._sender.cancel()
+        await asyncio.gather(self._sender, return_exceptions=True)
+        # Flush what was published during shutdown (e.g. failed submissions)
+        leftover = []
+        while not self._outbox.empty():
+            leftover.append(self._outbox.get_nowait())
+        if leftover:
+            await self._send(leftover)
+        self._sender = None
+        self._outbox = None
+
+    def _payload(self, tracking_id: int, event: Dict[str, Any]) -> str:
+        payload = json.dumps({"origin": self._origin, "tracking_id": tracking_id, "event": event})
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD:
+            event = {k: v for k, v in event.items() if k != "detail"}
+            event["detail_truncated"] = True
+            payload = json.dumps({"origin": self._origin, "tracking_id": tracking_id, "event": event})
+        return payload
+
+    async def _send(self, batch):
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(NOTIFY_SQL, [
+                    {"channel": PROGRESS_NOTIFY_CHANNEL, "payload": self._payload(tracking_id, event)}
+                    for tracking_id, event in batch
+                ])
+        except Exception as e:
+            print(f"Progress fan-out failed for {len(batch)} event(s): {e}")
+
+    async def _send_loop(self):
+        """Sends queued events in batches, one short transaction per batch."""
+        while True:
+            batch = [await self._outbox.get()]
+            while not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            await self._send(batch)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        if data.get("origin") == self._origin or "tracking_id" not in data:
+            return
+        self._deliver(data["tracking_id"], data["event"])
+
+    def history(self, tracking_id: int):
+        return list(self._history.get(tracking_id, ()))
+
+    def clear(self, tracking_id: int):
+        self._history.pop(tracking_id, None)
+
+    async def subscribe(self, tracking_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields past then live events for tracking_id until the pipeline's terminal event,
+        or until no event has arrived for idle_timeout seconds.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[tracking_id].add(queue)
+        try:
+            for event in self.history(tracking_id):
+                yield event
+                if _is_terminal(event):
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    return
+                yield event
+                if _is_terminal(event):
+                    return
+        finally:
+            self._subscribers[tracking_id].discard(queue)
+            if not self._subscribers[tracking_id]:
+                self._subscribers.pop(tracking_id, None)
+
+
+def _is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get("agent") == PIPELINE_AGENT and event.get("status") in ("completed", "failed")
+
+
+progress_bus = ProgressBus()
+
+
+def emit_progress(state: Dict[str, Any], agent: str, step: str, status: str = "in_progress",
+                  detail: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Publishes a structured progress event for the state's tracking_id and mirrors the
+    step text into state["progress_log"] for callers that still read the flat log.
+    """
+    if status not in ALLOWED_STATES:
+        raise ValueError(f"Invalid progress status '{status}'. Allowed: {', '.join(ALLOWED_STATES)}")
+
+    event = {
+        "tracking_id": state.get("tracking_id"),
+        "agent": agent,
+        "step": step,
+        "status": status,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    if detail:
+        event["detail"] = detail
+
+    state.setdefault("progress_log", []).append(step)
+    if event["tracking_id"] is not None:
+        progress_bus.publish(event["tracking_id"], event)
+    return event
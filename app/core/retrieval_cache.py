@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.corpus import get_corpus_version
+from app.db.models import RetrievalCache
+from app.db.session import async_session
+
+
+def make_retrieval_key(query: str, corpus_version: int, **params) -> str:
+    """
+    Cache key for one retrieval: the whitespace-normalized query, every parameter that
+    shapes the result (doc_type, top_k, mode, ...) and the policy-corpus version.
+    """
+    raw = json.dumps([" ".join(query.split()), corpus_version, sorted(params.items())], default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RetrievalResultCache:
+    """
+    Two-level cache of retrieved policy context strings: an in-memory LRU, optionally in
+    front of the retrieval_cache table shared by all workers (RETRIEVAL_CACHE_DB).
+    Keys embed the corpus version, so a new ingest invalidates every entry; the version
+    itself is re-read at most every version_check_seconds. A hit skips both the query
+    embedding and the vector search.
+    """
+
+    def __init__(self, maxsize: int, use_db: bool, version_check_seconds: float):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.use_db = use_db
+        self.version_check_seconds = version_check_seconds
+        self.db_hits = 0
+        self.misses = 0
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def corpus_version(self) -> int:
+        if self._version is not None and time.monotonic() - self._checked_at < self.version_check_seconds:
+            return self._version
+        async with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.version_check_seconds:
+                return self._version
+            async with async_session() as db:
+                version = await get_corpus_version(db)
+                if version != self._version:
+                    self.memory.clear()
+                    if self.use_db and self._version is not None:
+                        await db.execute(delete(RetrievalCache).where(RetrievalCache.corpus_version < version))
+                        await db.commit()
+            self._version = version
+            self._checked_at = time.monotonic()
+            return version
+
+    async def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        remaining = []
+        for key in keys:
+            context = self.memory.get(key)
+            if context is not None:
+                found[key] = context
+            else:
+                remaining.append(key)
+
+        if remaining and self.use_db:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(RetrievalCache.cache_key, RetrievalCache.context)
+                    .where(RetrievalCache.cache_key.in_(remaining))
+                )
+                rows = result.fetchall()
+            for key, context in rows:
+                self.memory.set(key, context)
+                found[key] = context
+            self.db_hits += len(rows)
+            self.misses += len(remaining) - len(rows)
+        else:
+            self.misses += len(remaining)
+
+        return found
+
+    async def put_many(self, entries: Dict[str, str], corpus_version: int):
+        """entries: cache_key -> context string, all retrieved at corpus_version."""
+        if not entries:
+            return
+        for key, context in entries.items():
+            self.memory.set(key, context)
+
+        if self.use_db:
+            rows = [
+                {"cache_key": key, "corpus_version": corpus_version, "context": context}
+                for key, context in entries.items()
+            ]
+            async with async_session() as db:
+                await db.execute(insert(RetrievalCache).values(rows).on_conflict_do_nothing())
+                await db.commit()
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.db_hits + self.misses
+        return {
+            "corpus_version": self._version,
+            "memory": memory,
+            "db_enabled": self.use_db,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+retrieval_cache = RetrievalResultCache(
+    maxsize=settings.RETRIEVAL_CACHE_SIZE,
+    use_db=settings.RETRIEVAL_CACHE_DB,
+    version_check_seconds=settings.RETRIEVAL_CACHE_VERSION_CHECK_SECONDS,
+)
@@ -1,60 +1,485 @@
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from pgvector.utils import Vector
 from app.db.session import async_session
+from app.core.config import settings
+from app.core.cache import LRUCache
+from app.core.embeddings import EMBEDDING_MODEL_NAME, load_embeddings_model
+from app.core.vector_index import QUANTIZATIONS, apply_search_params, candidate_search_sql, doc_type_predicate
+from app.core.vector_store import numpy_index
+from app.core.retrieval_cache import make_retrieval_key, retrieval_cache
+from app.core.context_packing import make_chunk, pack_context
 
 _embeddings_model = None
 
 def get_embeddings_model():
     global _embeddings_model
     if _embeddings_model is None:
-        _embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        _embeddings_model = load_embeddings_model()
     return _embeddings_model
 
 MAX_QUERY_LENGTH = 2000
 
 
-async def get_relevant_policy_context(query: str, scheme_id: str = None, top_k: int = 3) -> str:
+def _embed_documents(texts: List[str]) -> List[List[float]]:
+    # Runs on the embedding thread, which also pays the one-off model load.
+    return get_embeddings_model().embed_documents(texts)
+
+
+class EmbeddingBatcher:
     """
-    Performs vector similarity search against the PolicyDocument table.
-    Returns the concatenated top-k most relevant policy text chunks.
-    scheme_id is used as doc_type filter (e.g. "ADMIN" for admin panel context).
+    Runs embedding inference on a dedicated worker thread so the event loop never
+    blocks on the CPU forward pass. Concurrent requests are collected for up to
+    EMBED_BATCH_WINDOW_MS (or EMBED_BATCH_MAX_SIZE texts) and embedded together in one
+    embed_documents call; each caller's future is resolved with its own vectors.
+    """
+
+    def __init__(self, window_ms: float, max_batch_size: int):
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.batches = 0
+        self.texts = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(), name="embedding-batcher")
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.window
+        while size < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [t for request_texts, _ in batch for t in request_texts]
+            try:
+                vectors = await loop.run_in_executor(self._executor, _embed_documents, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache": query_embedding_cache.stats(),
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+embedding_batcher = EmbeddingBatcher(
+    window_ms=settings.EMBED_BATCH_WINDOW_MS,
+    max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+)
+
+
+query_embedding_cache = LRUCache(maxsize=settings.EMBED_CACHE_SIZE, ttl=settings.EMBED_CACHE_TTL)
+
+
+def _embedding_cache_key(text: str) -> Tuple[str, str]:
+    # all-MiniLM-L6-v2 lowercases its input, so case and whitespace runs don't change the vector.
+    return f"{EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_BACKEND}", " ".join(text.split()).lower()
+
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embeds texts through the shared micro-batching executor (off the event loop).
+    Repeated texts are served from query_embedding_cache without a forward pass.
     """
-    model = get_embeddings_model()
-    query_vector = model.embed_query(query)
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    misses: Dict[Tuple[str, str], List[int]] = {}
+    for i, t in enumerate(texts):
+        key = _embedding_cache_key(t)
+        cached = query_embedding_cache.get(key)
+        if cached is not None:
+            vectors[i] = cached
+        else:
+            misses.setdefault(key, []).append(i)
+
+    if misses:
+        positions = list(misses.values())
+        computed = await embedding_batcher.embed([texts[p[0]] for p in positions])
+        for key, idxs, vector in zip(misses.keys(), positions, computed):
+            query_embedding_cache.set(key, vector)
+            for i in idxs:
+                vectors[i] = vector
+    return vectors
+
+
+# plainto_tsquery ANDs every term; long document-content queries need OR semantics
+# so ts_rank_cd can reward chunks that cover more of the terms.
+OR_TSQUERY = "CAST(replace(CAST(plainto_tsquery('english', {query}) AS text), '&', '|') AS tsquery)"
+
+
+def _hybrid_sql(doc_type: Optional[str]):
+    """
+    Reciprocal-rank fusion of vector distance and full-text rank in one statement:
+    each side contributes 1 / (RRF_K + rank) for its top HYBRID_CANDIDATES chunks.
+    doc_type is inlined (see doc_type_predicate) so the partial per-doc_type indexes apply.
+    """
+    doc_filter = f"AND {doc_type_predicate(doc_type)}"
+    tsq = OR_TSQUERY.format(query=":query")
+    return text(f"""
+        WITH vec AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rnk
+            FROM (
+                SELECT id, embedding <-> CAST(:qv AS vector) AS distance
+                FROM policy_document
+                WHERE TRUE {doc_filter}
+                ORDER BY distance
+                LIMIT :candidates
+            ) v
+        ),
+        lex AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC) AS rnk
+            FROM (
+                SELECT id, ts_rank_cd(content_tsv, {tsq}) AS rank
+                FROM policy_document
+                WHERE content_tsv @@ {tsq} {doc_filter}
+                ORDER BY rank DESC
+                LIMIT :candidates
+            ) l
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (:rrf_k + rnk)) AS score
+            FROM (SELECT * FROM vec UNION ALL SELECT * FROM lex) ranked
+            GROUP BY id
+        )
+        SELECT p.content, p.metadata_json, p.embedding
+        FROM fused f
+        JOIN policy_document p ON p.id = f.id
+        ORDER BY f.score DESC
+        LIMIT :k
+    """)
+
+
+def _quantization(quantization: Optional[str]) -> str:
+    quantization = quantization or settings.VECTOR_QUANTIZATION
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization '{quantization}'. Use one of: {', '.join(QUANTIZATIONS)}")
+    return quantization
+
+
+def _rerank_candidates(top_k: int) -> int:
+    return max(settings.RERANK_CANDIDATES, top_k)
+
+
+def _vector_sql(doc_type: Optional[str], quantization: str):
+    search = candidate_search_sql("CAST(:qv AS vector)", doc_type_predicate(doc_type), ":k", quantization)
+    return text(f"SELECT content, metadata_json, embedding FROM ({search}) AS r ORDER BY distance")
+
+
+def _fetch_k(top_k: int) -> int:
+    # Context packing needs spare candidates to de-duplicate and diversify from.
+    return top_k * settings.CONTEXT_FETCH_FACTOR if settings.CONTEXT_PACKING else top_k
+
+
+def _assemble_context(rows, query_vector, top_k: int, token_budget: Optional[int]) -> str:
+    """Turns retrieved (content, metadata_json, embedding) rows into the prompt context."""
+    if not settings.CONTEXT_PACKING:
+        return "\n\n".join(row[0] for row in rows[:top_k])
+    return pack_context(
+        [make_chunk(*row) for row in rows],
+        query_vector,
+        max_chunks=top_k,
+        token_budget=settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget,
+        mmr_lambda=settings.CONTEXT_MMR_LAMBDA,
+        dedupe_threshold=settings.CONTEXT_DEDUP_THRESHOLD,
+    )
+
+
+async def _search_policy_context(
+    query: str,
+    scheme_id: Optional[str],
+    top_k: int,
+    ef_search: Optional[int],
+    probes: Optional[int],
+    mode: str,
+    quantization: str,
+    token_budget: Optional[int],
+) -> str:
+    """Uncached body of get_relevant_policy_context."""
+    query_vector = np.asarray((await embed_texts([query]))[0], dtype=np.float32)
+    fetch_k = _fetch_k(top_k)
+
+    if settings.RETRIEVER_BACKEND == "numpy" and mode != "hybrid":
+        rows = (await numpy_index.search_rows([(query_vector, scheme_id, fetch_k)]))[0]
+        return _assemble_context(rows, query_vector, top_k, token_budget)
     
     async with async_session() as db:
-        if scheme_id:
-            sql = text("""
-                SELECT content
-                FROM policy_document
-                WHERE doc_type = :doc_type
-                ORDER BY embedding <-> CAST(:qv AS vector)
-                LIMIT :k
-            """)
-            result = await db.execute(sql, {"doc_type": scheme_id, "qv": str(query_vector), "k": top_k})
+        await apply_search_params(db, ef_search or settings.VECTOR_EF_SEARCH, probes or settings.VECTOR_PROBES)
+        if mode == "hybrid":
+            params = {
+                "qv": query_vector, "query": query, "k": fetch_k,
+                "candidates": max(settings.HYBRID_CANDIDATES, fetch_k), "rrf_k": settings.RRF_K,
+            }
+            result = await db.execute(_hybrid_sql(scheme_id), params)
         else:
-            sql = text("""
-                SELECT content
-                FROM policy_document
-                ORDER BY embedding <-> CAST(:qv AS vector)
-                LIMIT :k
-            """)
-            result = await db.execute(sql, {"qv": str(query_vector), "k": top_k})
+            params = {"qv": query_vector, "k": fetch_k, "rerank_candidates": _rerank_candidates(fetch_k)}
+            result = await db.execute(_vector_sql(scheme_id, quantization), params)
         
         rows = result.fetchall()
     
     if not rows:
         return ""
     
-    return "\n\n".join(row[0] for row in rows)
+    return _assemble_context(rows, query_vector, top_k, token_budget)
+
+
+def _retrieval_key(query, doc_type, top_k, ef_search, probes, mode, quantization, token_budget, version) -> str:
+    return make_retrieval_key(
+        query, version, doc_type=doc_type or None, top_k=top_k, mode=mode, quantization=quantization,
+        ef_search=ef_search or settings.VECTOR_EF_SEARCH, probes=probes or settings.VECTOR_PROBES,
+        backend=settings.RETRIEVER_BACKEND, model=EMBEDDING_MODEL_NAME, embeddings=settings.EMBEDDING_BACKEND,
+        packing=settings.CONTEXT_PACKING and [
+            settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget,
+            settings.CONTEXT_FETCH_FACTOR, settings.CONTEXT_MMR_LAMBDA, settings.CONTEXT_DEDUP_THRESHOLD,
+        ],
+    )
+
+
+async def get_relevant_policy_context(
+    query: str,
+    scheme_id: str = None,
+    top_k: int = 3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    mode: Optional[str] = None,
+    quantization: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    Performs vector similarity search against the PolicyDocument table.
+    Returns the concatenated top-k most relevant policy text chunks.
+    scheme_id is used as doc_type filter (e.g. "ADMIN" for admin panel context).
+    ef_search / probes tune the HNSW / IVFFlat index for this query only
+    (defaults: VECTOR_EF_SEARCH / VECTOR_PROBES).
+    mode="hybrid" fuses full-text rank and vector distance with RRF in SQL, which
+    matches rule numbers and section references better (default: RETRIEVAL_MODE).
+    quantization="half"/"bit" searches the compact embedding column first and re-ranks
+    RERANK_CANDIDATES rows by exact distance (default: VECTOR_QUANTIZATION).
+    With RETRIEVER_BACKEND="numpy" vector-only searches run against the in-process snapshot instead.
+    With CONTEXT_PACKING the chunks are de-duplicated, MMR-selected within token_budget
+    tiktoken tokens (default: CONTEXT_TOKEN_BUDGET) and adjacent chunks are stitched.
+    Results are cached per corpus version in retrieval_cache.
+    """
+    mode = mode or settings.RETRIEVAL_MODE
+    quantization = _quantization(quantization)
+    version = await retrieval_cache.corpus_version()
+    key = _retrieval_key(query, scheme_id, top_k, ef_search, probes, mode, quantization, token_budget, version)
+    cached = (await retrieval_cache.get_many([key])).get(key)
+    if cached is not None:
+        return cached
+
+    context = await _search_policy_context(
+        query, scheme_id, top_k, ef_search, probes, mode, quantization, token_budget
+    )
+    await retrieval_cache.put_many({key: context}, version)
+    return context
+
+
+def _batch_vector_sql(quantization: str, doc_type: Optional[str]):
+    """
+    Vector top-k for a batch of queries sharing one doc_type. The doc_type is inlined as a
+    literal so each LATERAL probe can use that doc_type's partial HNSW index.
+    """
+    search = candidate_search_sql("q.qv", doc_type_predicate(doc_type), "q.k", quantization)
+    return text(f"""
+        SELECT q.idx, p.content, p.metadata_json, p.embedding
+        FROM unnest(CAST(:idxs AS int[]), CAST(:qvs AS vector[]), CAST(:ks AS int[])) AS q(idx, qv, k)
+        CROSS JOIN LATERAL ({search}) AS p
+        ORDER BY q.idx, p.distance
+    """)
+
+
+def _batch_hybrid_sql(doc_type: Optional[str]):
+    """Batched _hybrid_sql for queries sharing one doc_type (inlined, as in _batch_vector_sql)."""
+    doc_filter = doc_type_predicate(doc_type)
+    return text(f"""
+        SELECT q.idx, h.content, h.metadata_json, h.embedding
+        FROM unnest(
+            CAST(:idxs AS int[]), CAST(:qvs AS vector[]), CAST(:queries AS text[]), CAST(:ks AS int[])
+        ) AS q(idx, qv, query, k)
+        CROSS JOIN LATERAL (SELECT {OR_TSQUERY.format(query="q.query")} AS tsq) AS t
+        CROSS JOIN LATERAL (
+            SELECT p.content, p.metadata_json, p.embedding, f.score
+            FROM (
+                SELECT id, SUM(1.0 / (:rrf_k + rnk)) AS score
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rnk
+                    FROM (
+                        SELECT id, embedding <-> q.qv AS distance
+                        FROM policy_document
+                        WHERE {doc_filter}
+                        ORDER BY distance
+                        LIMIT :candidates
+                    ) v
+                    UNION ALL
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC) AS rnk
+                    FROM (
+                        SELECT id, ts_rank_cd(content_tsv, t.tsq) AS rank
+                        FROM policy_document
+                        WHERE content_tsv @@ t.tsq AND {doc_filter}
+                        ORDER BY rank DESC
+                        LIMIT :candidates
+                    ) l
+                ) ranked
+                GROUP BY id
+            ) f
+            JOIN policy_document p ON p.id = f.id
+            ORDER BY f.score DESC
+            LIMIT q.k
+        ) AS h
+        ORDER BY q.idx, h.score DESC
+    """)
+
+
+async def _search_policy_contexts_batch(
+    queries: List[Tuple[str, Optional[str], int]],
+    ef_search: Optional[int],
+    probes: Optional[int],
+    mode: str,
+    quantization: str,
+    token_budget: Optional[int],
+) -> List[str]:
+    """Uncached body of get_relevant_policy_contexts_batch."""
+    vectors = await embed_texts([q for q, _, _ in queries])
+
+    if settings.RETRIEVER_BACKEND == "numpy" and mode != "hybrid":
+        results = await numpy_index.search_rows([
+            (vector, doc_type, _fetch_k(k)) for vector, (_, doc_type, k) in zip(vectors, queries)
+        ])
+        return [
+            _assemble_context(rows, vector, k, token_budget)
+            for rows, vector, (_, _, k) in zip(results, vectors, queries)
+        ]
+
+    # One statement per doc_type, so every probe can use that doc_type's partial index
+    by_doc_type: Dict[Optional[str], List[int]] = {}
+    for i, (_, doc_type, _) in enumerate(queries):
+        by_doc_type.setdefault(doc_type or None, []).append(i)
+
+    rows = []
+    async with async_session() as db:
+        await apply_search_params(db, ef_search or settings.VECTOR_EF_SEARCH, probes or settings.VECTOR_PROBES)
+        for doc_type, idxs in by_doc_type.items():
+            params = {
+                "idxs": idxs,
+                # Vector, not ndarray: asyncpg would treat an ndarray as a nested array dimension
+                "qvs": [Vector(vectors[i]) for i in idxs],
+                "ks": [_fetch_k(queries[i][2]) for i in idxs],
+            }
+            if mode == "hybrid":
+                params["queries"] = [queries[i][0] for i in idxs]
+                params["candidates"] = max([settings.HYBRID_CANDIDATES] + params["ks"])
+                params["rrf_k"] = settings.RRF_K
+                result = await db.execute(_batch_hybrid_sql(doc_type), params)
+            else:
+                params["rerank_candidates"] = _rerank_candidates(max(params["ks"]))
+                result = await db.execute(_batch_vector_sql(quantization, doc_type), params)
+            rows.extend(result.fetchall())
+
+    grouped: List[list] = [[] for _ in queries]
+    for idx, *row in rows:
+        grouped[idx].append(row)
+    return [
+        _assemble_context(group, vector, k, token_budget)
+        for group, vector, (_, _, k) in zip(grouped, vectors, queries)
+    ]
+
+
+async def get_relevant_policy_contexts_batch(
+    queries: List[Tuple[str, Optional[str], int]],
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    mode: Optional[str] = None,
+    quantization: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> List[str]:
+    """
+    Batch version of get_relevant_policy_context.
+    Takes a list of (query, doc_type, top_k), embeds every query in one batched
+    forward pass and fetches the top-k sets with one LATERAL-join statement per doc_type.
+    Returns one concatenated context string per query, in input order.
+    Only queries missing from retrieval_cache are embedded and searched.
+    """
+    if not queries:
+        return []
+
+    mode = mode or settings.RETRIEVAL_MODE
+    quantization = _quantization(quantization)
+    version = await retrieval_cache.corpus_version()
+    keys = [
+        _retrieval_key(q, doc_type, k, ef_search, probes, mode, quantization, token_budget, version)
+        for q, doc_type, k in queries
+    ]
+    found = await retrieval_cache.get_many(keys)
+
+    misses: Dict[str, Tuple[str, Optional[str], int]] = {}
+    for key, query in zip(keys, queries):
+        if key not in found:
+            misses.setdefault(key, query)
+    if misses:
+        contexts = await _search_policy_contexts_batch(
+            list(misses.values()), ef_search, probes, mode, quantization, token_budget
+        )
+        fresh = dict(zip(misses.keys(), contexts))
+        await retrieval_cache.put_many(fresh, version)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+def _regulation_query(document_content: str, requirement_name: str) -> str:
+    return (requirement_name + " " + document_content.strip())[:MAX_QUERY_LENGTH]
 
 
 async def get_regulations_for_document_content(
     document_content: str,
     requirement_name: str,
     scheme_id: str = None,
-    top_k: int = 5
+    top_k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    mode: Optional[str] = None,
 ) -> str:
     """
     Cross-checks document content against regulations by querying the vector DB
@@ -62,5 +487,30 @@ async def get_regulations_for_document_content(
     """
     if not document_content or not document_content.strip():
         return ""
-    query = (requirement_name + " " + document_content.strip())[:MAX_QUERY_LENGTH]
-    return await get_relevant_policy_context(query=query, scheme_id=scheme_id, top_k=top_k)
+    query = _regulation_query(document_content, requirement_name)
+    return await get_relevant_policy_context(
+        query=query, scheme_id=scheme_id, top_k=top_k, ef_search=ef_search, probes=probes, mode=mode
+    )
+
+
+async def get_regulations_for_documents_batch(
+    documents: List[Tuple[str, str]],
+    scheme_id: str = None,
+    top_k: int = 5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[str]:
+    """
+    Batch version of get_regulations_for_document_content for a list of
+    (document_content, requirement_name). Empty documents get "" without being queried.
+    """
+    results = [""] * len(documents)
+    positions = [i for i, (content, _) in enumerate(documents) if content and content.strip()]
+    contexts = await get_relevant_policy_contexts_batch([
+        (_regulation_query(documents[i][0], documents[i][1]), scheme_id, top_k)
+        for i in positions
+    ], ef_search=ef_search, probes=probes, mode=mode)
+    for i, context in zip(positions, contexts):
+        results[i] = context
+    return results
@@ -0,0 +1,161 @@
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VECTOR_TABLE = "policy_document"
+VECTOR_COLUMN = "embedding"
+# retriever.py orders by `<->` (L2 distance), so indexes must use the L2 operator class.
+VECTOR_OPCLASS = "vector_l2_ops"
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+# Compact representations of `embedding`: column, operator class and distance operator.
+QUANTIZATIONS = {
+    "none": (VECTOR_COLUMN, VECTOR_OPCLASS, "<->"),
+    "half": ("embedding_half", "halfvec_l2_ops", "<->"),
+    "bit": ("embedding_bit", "bit_hamming_ops", "<~>"),
+}
+
+
+def vector_index_name(method: str, doc_type: Optional[str] = None, quantization: str = "none") -> str:
+    column = QUANTIZATIONS[quantization][0]
+    name = f"ix_{VECTOR_TABLE}_{column}_{method}"
+    if doc_type:
+        slug = re.sub(r"[^a-z0-9]+", "_", doc_type.lower()).strip("_")
+        name = f"{name}_{slug}"
+    return name[:63]
+
+
+def doc_type_predicate(doc_type: Optional[str]) -> str:
+    """
+    WHERE predicate for one doc_type, written as a literal so the planner can match it
+    against the partial per-doc_type indexes (a bound parameter or a column reference can't).
+    """
+    if not doc_type:
+        return "TRUE"
+    return "doc_type = '" + doc_type.replace("'", "''") + "'"
+
+
+def vector_index_sql(
+    method: str = "hnsw",
+    doc_type: Optional[str] = None,
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int = 100,
+    concurrently: bool = True,
+    quantization: str = "none",
+) -> str:
+    """
+    Builds CREATE INDEX for policy_document.embedding (or one of its quantized copies).
+    With doc_type set, the index is partial (WHERE doc_type = ...) so filtered retrieval
+    only walks that doc_type's graph.
+    """
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unsupported vector index method '{method}'. Use one of: {', '.join(INDEX_METHODS)}")
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization '{quantization}'. Use one of: {', '.join(QUANTIZATIONS)}")
+    column, opclass, _ = QUANTIZATIONS[quantization]
+
+    if method == "hnsw":
+        options = f"(m = {int(m)}, ef_construction = {int(ef_construction)})"
+    else:
+        options = f"(lists = {int(lists)})"
+
+    sql = (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{vector_index_name(method, doc_type, quantization)} "
+        f"ON {VECTOR_TABLE} USING {method} ({column} {opclass}) WITH {options}"
+    )
+    if doc_type:
+        sql += f" WHERE {doc_type_predicate(doc_type)}"
+    return sql
+
+
+def drop_vector_index_sql(method: str = "hnsw", doc_type: Optional[str] = None, concurrently: bool = True,
+                          quantization: str = "none") -> str:
+    return (
+        f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS "
+        f"{vector_index_name(method, doc_type, quantization)}"
+    )
+
+
+def quantized_expressions(column: str = VECTOR_COLUMN) -> Dict[str, str]:
+    """SQL expressions deriving each quantized column from a float vector column."""
+    return {
+        "embedding_half": f"CAST({column} AS halfvec(384))",
+        "embedding_bit": f"CAST(binary_quantize({column}) AS bit(384))",
+    }
+
+
+async def populate_quantized_columns(conn: AsyncConnection) -> int:
+    """Fills embedding_half / embedding_bit from embedding for rows that lack them."""
+    expressions = quantized_expressions()
+    result = await conn.execute(text(f"""
+        UPDATE {VECTOR_TABLE}
+        SET {", ".join(f"{name} = {expr}" for name, expr in expressions.items())}
+        WHERE {VECTOR_COLUMN} IS NOT NULL
+          AND (embedding_half IS NULL OR embedding_bit IS NULL)
+    """))
+    return result.rowcount
+
+
+def candidate_search_sql(qv: str, where: str, limit: str, quantization: str = "none") -> str:
+    """
+    SQL fragment yielding (id, content, metadata_json, embedding, distance) for the
+    nearest chunks to the vector expression qv, ordered by exact L2 distance. With a
+    quantization, the compact column is searched first for :rerank_candidates rows,
+    which are then re-ranked exactly. Rows whose compact column is still NULL are not
+    reachable that way; ingest_policies.py fills it whenever a quantization is configured.
+    """
+    if quantization == "none":
+        return f"""
+            SELECT id, content, metadata_json, {VECTOR_COLUMN}, {VECTOR_COLUMN} <-> {qv} AS distance
+            FROM {VECTOR_TABLE}
+            WHERE {where}
+            ORDER BY distance
+            LIMIT {limit}
+        """
+    column, _, operator = QUANTIZATIONS[quantization]
+    compact_qv = f"CAST({qv} AS halfvec(384))" if quantization == "half" else f"binary_quantize({qv})"
+    return f"""
+            SELECT id, content, metadata_json, {VECTOR_COLUMN}, {VECTOR_COLUMN} <-> {qv} AS distance
+            FROM (
+                SELECT id, content, metadata_json, {VECTOR_COLUMN}
+                FROM {VECTOR_TABLE}
+                WHERE {where}
+                ORDER BY {column} {operator} {compact_qv}
+                LIMIT :rerank_candidates
+            ) candidates
+            ORDER BY distance
+            LIMIT {limit}
+        """
+
+
+async def list_doc_types(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(text(
+        f"SELECT DISTINCT doc_type FROM {VECTOR_TABLE} WHERE doc_type IS NOT NULL ORDER BY doc_type"
+    ))
+    return [row[0] for row in result.fetchall()]
+
+
+async def list_vector_indexes(conn: AsyncConnection) -> List[dict]:
+    result = await conn.execute(text("""
+        SELECT indexname, indexdef
+        FROM pg_indexes
+        WHERE tablename = :table
+          AND (indexdef ILIKE '%USING hnsw%' OR indexdef ILIKE '%USING ivfflat%')
+        ORDER BY indexname
+    """), {"table": VECTOR_TABLE})
+    return [{"name": name, "definition": definition} for name, definition in result.fetchall()]
+
+
+async def apply_search_params(conn, ef_search: Optional[int] = None, probes: Optional[int] = None):
+    """
+    Sets hnsw.ef_search / ivfflat.probes for the current transaction only, trading
+    recall against latency per query. conn may be an AsyncSession or AsyncConnection.
+    """
+    if ef_search:
+        await conn.execute(text("SELECT set_config('hnsw.ef_search', :v, true)"), {"v": str(int(ef_search))})
+    if probes:
+        await conn.execute(text("SELECT set_config('ivfflat.probes', :v, true)"), {"v": str(int(probes))})
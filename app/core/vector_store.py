@@ -0,0 +1,215 @@
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.corpus import get_corpus_version
+from app.db.session import async_session
+
+SNAPSHOT_PREFIX = "policy_index_v"
+SNAPSHOT_FILE_RE = re.compile(rf"^{SNAPSHOT_PREFIX}(\d+)\.(?:npy|meta\.json)$")
+
+
+def _snapshot_paths(snapshot_dir: Path, version: int) -> Tuple[Path, Path]:
+    base = snapshot_dir / f"{SNAPSHOT_PREFIX}{version}"
+    return base.with_suffix(".npy"), base.with_suffix(".meta.json")
+
+
+def prune_snapshots(snapshot_dir: Path, keep_from: int) -> int:
+    """Deletes snapshot files older than version keep_from; returns the number removed."""
+    removed = 0
+    for path in snapshot_dir.iterdir():
+        match = SNAPSHOT_FILE_RE.match(path.name)
+        if match and int(match.group(1)) < keep_from:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # e.g. Windows refuses to delete a file another worker still has memory-mapped
+                print(f"Vector snapshot: could not delete {path.name} ({e}); retrying on the next build")
+    return removed
+
+
+async def build_snapshot(snapshot_dir: Path, version: Optional[int] = None) -> int:
+    """
+    Dumps every policy_document embedding into a float32 .npy matrix plus a
+    .meta.json (row ids and doc_types) tagged with the corpus version.
+    Files are written under a temporary name and renamed, so readers never see a partial snapshot.
+    Once published, snapshots older than the previous version are deleted; workers that
+    have not refreshed yet keep the previous one. Returns the version written.
+    """
+    async with async_session() as db:
+        if version is None:
+            version = await get_corpus_version(db)
+        result = await db.execute(text(
+            "SELECT id, doc_type, embedding FROM policy_document WHERE embedding IS NOT NULL ORDER BY id"
+        ))
+        rows = result.fetchall()
+
+    await asyncio.to_thread(_write_snapshot, snapshot_dir, version, rows)
+    return version
+
+
+def _write_snapshot(snapshot_dir: Path, version: int, rows) -> None:
+    """Blocking half of build_snapshot: builds, publishes and prunes the snapshot files."""
+    dim = len(rows[0][2]) if rows else 0
+    matrix = np.empty((len(rows), dim), dtype=np.float32)
+    for i, (_, _, embedding) in enumerate(rows):
+        matrix[i] = embedding
+    meta = {
+        "version": version,
+        "ids": [row[0] for row in rows],
+        "doc_types": [row[1] for row in rows],
+    }
+
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    matrix_path, meta_path = _snapshot_paths(snapshot_dir, version)
+    tmp_matrix = matrix_path.with_name(f"{matrix_path.stem}.{os.getpid()}.tmp.npy")
+    tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+    np.save(tmp_matrix, matrix)
+    tmp_meta.write_text(json.dumps(meta))
+    os.replace(tmp_meta, meta_path)
+    os.replace(tmp_matrix, matrix_path)
+    prune_snapshots(snapshot_dir, version - 1)
+
+
+class NumpyVectorIndex:
+    """
+    In-process top-k search over all policy_document embeddings.
+
+    The matrix is opened as a read-only memory map, so every uvicorn worker on a host
+    shares the same page-cache copy. Distances are exact L2 (same ordering as pgvector's
+    `<->`), computed as ||x||^2 - 2 x.q with argpartition; doc_type filters are boolean
+    masks. Only the winning chunk texts are read, through a small LRU of chunk contents.
+    The corpus version is re-checked every VECTOR_INDEX_REFRESH_SECONDS in the background.
+    """
+
+    def __init__(self, snapshot_dir: str, refresh_seconds: float, content_cache_size: int):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.refresh_seconds = refresh_seconds
+        self.contents = LRUCache(maxsize=content_cache_size)
+        self.version: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._sq_norms: Optional[np.ndarray] = None
+        self._ids: Optional[np.ndarray] = None
+        self._masks: Dict[str, np.ndarray] = {}
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _read(self, version: int):
+        """Runs in a thread: maps the snapshot and precomputes norms and doc_type masks."""
+        matrix_path, meta_path = _snapshot_paths(self.snapshot_dir, version)
+        if not matrix_path.exists() or not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        matrix = np.load(matrix_path, mmap_mode="r")
+        doc_types = np.array([d or "" for d in meta["doc_types"]], dtype=object)
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix) if len(matrix) else np.empty(0, np.float32)
+        masks = {d: doc_types == d for d in set(doc_types.tolist()) if d}
+        return matrix, sq_norms, np.asarray(meta["ids"], dtype=np.int64), masks
+
+    async def _load(self, version: int) -> bool:
+        loaded = await asyncio.to_thread(self._read, version)
+        if loaded is None:
+            return False
+        self._matrix, self._sq_norms, self._ids, self._masks = loaded
+        self.version = version
+        self.contents.clear()
+        return True
+
+    async def refresh(self):
+        """Loads (building if needed) the snapshot for the current corpus version."""
+        async with self._lock:
+            async with async_session() as db:
+                version = await get_corpus_version(db)
+            self._last_check = time.monotonic()
+            if version == self.version:
+                return
+            if not await self._load(version):
+                await build_snapshot(self.snapshot_dir, version)
+                await self._load(version)
+
+    async def ensure_loaded(self):
+        if self._matrix is None:
+            await self.refresh()
+        elif time.monotonic() - self._last_check > self.refresh_seconds:
+            self._last_check = time.monotonic()
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh())
+
+    def _top_k(self, query: np.ndarray, doc_type: Optional[str], k: int) -> List[int]:
+        """Matrix row positions of the k nearest chunks, nearest first."""
+        if self._matrix is None or not len(self._matrix) or k <= 0:
+            return []
+        distances = self._sq_norms - 2.0 * (self._matrix @ query)
+        if doc_type:
+            mask = self._masks.get(doc_type)
+            if mask is None:
+                return []
+            candidates = np.flatnonzero(mask)
+            distances = distances[candidates]
+        else:
+            candidates = None
+
+        k = min(k, len(distances))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        if candidates is not None:
+            top = candidates[top]
+        return top.tolist()
+
+    async def _fetch_contents(self, ids: List[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+        """(content, metadata_json) per chunk id."""
+        found = {}
+        missing = []
+        for doc_id in ids:
+            entry = self.contents.get(doc_id)
+            if entry is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = entry
+        if missing:
+            async with async_session() as db:
+                result = await db.execute(
+                    text("SELECT id, content, metadata_json FROM policy_document WHERE id = ANY(:ids)"),
+                    {"ids": missing},
+                )
+                for doc_id, content, metadata_json in result.fetchall():
+                    self.contents.set(doc_id, (content, metadata_json))
+                    found[doc_id] = (content, metadata_json)
+        return found
+
+    async def search_rows(
+        self, queries: List[Tuple[np.ndarray, Optional[str], int]]
+    ) -> List[List[Tuple[str, Optional[str], np.ndarray]]]:
+        """Top-k (content, metadata_json, embedding) for each (query_vector, doc_type, k), in input order."""
+        await self.ensure_loaded()
+        hits = [self._top_k(np.asarray(q, dtype=np.float32), doc_type, k) for q, doc_type, k in queries]
+        ids = [self._ids[rows].tolist() for rows in hits]
+        contents = await self._fetch_contents(sorted({i for chunk_ids in ids for i in chunk_ids}))
+        return [
+            [(*contents[i], self._matrix[row]) for i, row in zip(chunk_ids, rows) if i in contents]
+            for chunk_ids, rows in zip(ids, hits)
+        ]
+
+    async def search_many(self, queries: List[Tuple[np.ndarray, Optional[str], int]]) -> List[List[str]]:
+        """Top-k chunk texts for each (query_vector, doc_type, k), in input order."""
+        return [[content for content, _, _ in rows] for rows in await self.search_rows(queries)]
+
+
+numpy_index = NumpyVectorIndex(
+    snapshot_dir=settings.VECTOR_SNAPSHOT_DIR,
+    refresh_seconds=settings.VECTOR_INDEX_REFRESH_SECONDS,
+    content_cache_size=settings.VECTOR_CONTENT_CACHE_SIZE,
+)
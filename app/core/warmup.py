@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def _warm_llm():
+    from app.core.llm import get_llm
+    get_llm()
+
+
+def _warm_graph():
+    from app.graph.workflow import app_workflow
+    return app_workflow
+
+
+async def _warm_embeddings():
+    # Loads the model on the embedding worker thread and runs one forward pass,
+    # so the first real query pays neither the load nor the lazy kernel setup.
+    from app.core.retriever import embedding_batcher
+    await embedding_batcher.embed(["warm-up"])
+
+
+def _warm_tokenizer():
+    # Context packing counts tokens with tiktoken, whose encoding is downloaded on first use.
+    from app.core.context_packing import load_tokenizer
+    if not load_tokenizer():
+        raise RuntimeError("tiktoken encoding unavailable; using the character estimate")
+
+
+class Warmup:
+    """
+    Warms expensive process-wide resources in the background after startup.
+    Each component runs concurrently; sync loaders run on worker threads so the event
+    loop keeps serving /health meanwhile. ready() turns true once every component has
+    finished and none of the required ones failed.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, name: str, loader: Callable[[], Any], required: bool):
+        status = self.components[name]
+        started = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(loader):
+                await loader()
+            else:
+                await asyncio.to_thread(loader)
+            status["status"] = "ready"
+        except Exception as e:
+            status["status"] = "failed"
+            status["error"] = str(e)
+            print(f"Warm-up of {name} failed{'' if required else ' (optional)'}: {e}")
+        status["seconds"] = round(time.monotonic() - started, 3)
+
+    def start(self, loaders: Dict[str, Callable[[], Any]], optional=()):
+        self.components = {
+            name: {"status": "warming", "required": name not in optional} for name in loaders
+        }
+        self._task = asyncio.create_task(self._run_all(loaders, optional), name="warmup")
+
+    async def _run_all(self, loaders: Dict[str, Callable[[], Any]], optional):
+        await asyncio.gather(*(
+            self._run(name, loader, name not in optional) for name, loader in loaders.items()
+        ))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def ready(self) -> bool:
+        return self._task is not None and self._task.done() and not any(
+            c["required"] and c["status"] != "ready" for c in self.components.values()
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready(), "components": self.components}
+
+
+WARMUP_LOADERS: Dict[str, Callable[[], Any]] = {
+    "embeddings": _warm_embeddings,
+    "llm": _warm_llm,
+    "graph": _warm_graph,
+    "tokenizer": _warm_tokenizer,
+}
+# The LangGraph workflow is not on the /submit path, and token counting has a fallback,
+# so neither gates readiness.
+WARMUP_OPTIONAL = ("graph", "tokenizer")
+
+warmup = Warmup()
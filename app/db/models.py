@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, TIMESTAMP, Text, func
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Boolean, ForeignKey, TIMESTAMP, Text, Computed, Index, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC, BIT
 from .database import Base
 
 
@@ -110,7 +111,35 @@ class PolicyDocument(Base):
     doc_type = Column(String(50), nullable=True)
     content = Column(Text, nullable=False)
     embedding = Column(Vector(384))
+    # Source file name and sha256 of content: lets ingest_policies.py keep unchanged chunks across runs
+    source = Column(String(255), nullable=True, index=True)
+    content_hash = Column(String(64), nullable=True)
+    # Optional compact copies of `embedding` (populated by ingest_policies.py when VECTOR_QUANTIZATION is set),
+    # searched first and re-ranked with the exact float vector.
+    embedding_half = Column(HALFVEC(384), nullable=True)
+    embedding_bit = Column(BIT(384), nullable=True)
     metadata_json = Column(String(500), nullable=True)
+    # Full-text search vector for hybrid retrieval; maintained by Postgres.
+    content_tsv = Column(TSVECTOR, Computed("to_tsvector('english', content)", persisted=True))
+
+    __table_args__ = (
+        Index("ix_policy_document_content_tsv", "content_tsv", postgresql_using="gin"),
+        Index("uq_policy_document_source_content_hash", "source", "content_hash", unique=True),
+    )
+
+
+class PolicySource(Base):
+    """Manifest of ingested policy files, used to skip unchanged files on re-ingestion."""
+    __tablename__ = "policy_source"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(255), unique=True, nullable=False)
+    doc_type = Column(String(50), nullable=True)
+    file_hash = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    mtime = Column(Float, nullable=False)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
 class DocumentUpload(Base):
     __tablename__ = "document_upload"
@@ -125,3 +154,32 @@ class DocumentUpload(Base):
 
     citizen = relationship("Citizen")
 
+
+
+class PolicyCorpusVersion(Base):
+    __tablename__ = "policy_corpus_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+class ComplianceCache(Base):
+    __tablename__ = "compliance_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    requirement_name = Column(String(100), nullable=False)
+    scheme_id = Column(String(50), nullable=True)
+    model_name = Column(String(100), nullable=False)
+    corpus_version = Column(Integer, nullable=False)
+    verdict_json = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+
+class RetrievalCache(Base):
+    __tablename__ = "retrieval_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    corpus_version = Column(Integer, nullable=False, index=True)
+    context = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
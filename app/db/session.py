@@ -1,10 +1,27 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from pgvector.asyncpg import register_vector
 from app.db.models import Base
 from app.core.config import settings
 
 # For async postgres connections we use asyncpg
 engine = create_async_engine(settings.DATABASE_URL, echo=True, future=True)
 
+
+async def _register_vector_codec(conn):
+    try:
+        await register_vector(conn)
+    except ValueError:
+        # Fresh database: the extension must exist before its type codec can be registered.
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await register_vector(conn)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    """Registers the binary pgvector codec so vectors are bound as float32 arrays, not text."""
+    dbapi_connection.run_async(_register_vector_codec)
+
 # Generate an AsyncSession creator
 async_session = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -0,0 +1,208 @@
+import json
+import httpx
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Document, Citizen, Requirement
+from app.core.ocr_events import ocr_waiters
+
+TESSERACT_LAMBDA_URL = "https://cwtrytr9te.execute-api.ap-south-1.amazonaws.com/upload"
+
+
+class DocumentServiceError(Exception):
+    """Raised for lookup/upload failures; status_code mirrors the HTTP status the API returns."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def build_rag_json(requirement_name: str, doc_type_slug: str, ocr_text: str) -> dict:
+    """
+    Converts raw OCR text into a structured JSON payload ready for RAG compliance assessment.
+    Format: {requirement_name: {doc_type, raw_text, summary_lines}}
+    """
+    lines = [l.strip() for l in ocr_text.splitlines() if l.strip()]
+    return {
+        requirement_name: {
+            "doc_type": doc_type_slug,
+            "raw_text": ocr_text,
+            "summary_lines": lines[:30],
+            "char_count": len(ocr_text)
+        }
+    }
+
+
+async def get_citizen_by_aadhar(db: AsyncSession, aadhar_number: str) -> Optional[Citizen]:
+    result = await db.execute(select(Citizen).where(Citizen.aadhar_number == aadhar_number))
+    return result.scalars().first()
+
+
+async def get_completed_document(db: AsyncSession, citizen_id: int, requirement_id: int) -> Optional[Document]:
+    result = await db.execute(
+        select(Document).where(
+            Document.citizen_id == citizen_id,
+            Document.requirement_id == requirement_id,
+            Document.status == "completed"
+        )
+    )
+    return result.scalars().first()
+
+
+async def get_document_by_job_id(db: AsyncSession, job_id: str) -> Optional[Document]:
+    result = await db.execute(select(Document).where(Document.job_id == job_id))
+    return result.scalars().first()
+
+
+async def upload_document(
+    db: AsyncSession,
+    citizen: Citizen,
+    requirement_id: int,
+    file_bytes: bytes,
+    filename: str,
+) -> Dict[str, Any]:
+    """
+    Sends a document to the Tesseract Lambda API and saves a Document record with
+    status='processing' and the returned job_id. Reuses an already completed Document
+    for the same citizen + requirement instead of re-uploading.
+    """
+    req_result = await db.execute(
+        select(Requirement).where(Requirement.id == requirement_id)
+    )
+    requirement = req_result.scalars().first()
+    if not requirement:
+        raise DocumentServiceError(404, f"Requirement {requirement_id} not found.")
+
+    existing_doc = await get_completed_document(db, citizen.id, requirement_id)
+    if existing_doc:
+        return {
+            "already_exists": True,
+            "job_id": existing_doc.job_id,
+            "file_url": existing_doc.file_url,
+            "status": existing_doc.status,
+            "message": f"'{requirement.name}' already uploaded and processed for this citizen."
+        }
+
+    if len(file_bytes) == 0:
+        raise DocumentServiceError(400, "Uploaded file is empty.")
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        response = await client.post(
+            TESSERACT_LAMBDA_URL,
+            headers={
+                "x-filename": filename,
+                "Content-Type": "application/pdf"
+            },
+            content=file_bytes
+        )
+
+    if response.status_code != 200:
+        raise DocumentServiceError(502, f"Tesseract Lambda error: {response.text[:200]}")
+
+    ocr_response = response.json()
+    job_id = ocr_response.get("job_id")
+    s3_url = ocr_response.get("s3_url")
+    s3_key = ocr_response.get("s3_key")
+
+    doc = Document(
+        citizen_id=citizen.id,
+        requirement_id=requirement_id,
+        document_name=requirement.name,
+        job_id=job_id,
+        s3_key=s3_key,
+        file_url=s3_url,
+        status="processing"
+    )
+    db.add(doc)
+    await db.commit()
+    await db.refresh(doc)
+
+    return {
+        "already_exists": False,
+        "document_id": doc.id,
+        "job_id": job_id,
+        "s3_url": s3_url,
+        "status": "processing",
+        "message": "File uploaded. OCR in progress. Await webhook callback."
+    }
+
+
+async def resolve_document(db: AsyncSession, job_id: str, s3_key: Optional[str] = None) -> Optional[Document]:
+    """Find Document by job_id first, then by s3_key if present (for webhooks that send hash as job_id)."""
+    doc = await get_document_by_job_id(db, job_id)
+    if doc:
+        return doc
+    if s3_key:
+        result = await db.execute(
+            select(Document).where(Document.s3_key == s3_key)
+        )
+        doc = result.scalars().first()
+    return doc
+
+
+async def apply_ocr_result(
+    db: AsyncSession,
+    doc: Document,
+    status: str,
+    ocr_text: str = "",
+    error_message: Optional[str] = None,
+) -> str:
+    """
+    Stores the OCR outcome on doc and wakes any waiters. Normalizes 'success' -> 'completed'.
+    Returns the normalized status.
+    """
+    status = status.strip().lower()
+    if status == "success":
+        status = "completed"
+    doc.status = status
+
+    if status == "completed" and ocr_text:
+        req_result = await db.execute(
+            select(Requirement).where(Requirement.id == doc.requirement_id)
+        )
+        req = req_result.scalars().first()
+
+        doc_type_slug = ""
+        if req:
+            await db.refresh(req, ["doc_type"])
+            if req.doc_type:
+                doc_type_slug = req.doc_type.slug
+
+        rag_json = build_rag_json(
+            requirement_name=doc.document_name,
+            doc_type_slug=doc_type_slug,
+            ocr_text=ocr_text
+        )
+        doc.ocr_summary = json.dumps(rag_json)
+
+    elif status == "failed":
+        doc.ocr_summary = json.dumps({"error": error_message or "OCR failed."})
+
+    final = status in ("completed", "failed")
+    if final:
+        await ocr_waiters.notify(db, doc.job_id, status)
+
+    await db.commit()
+    if final:
+        # Only after the commit, so woken waiters read the final row
+        ocr_waiters.resolve(doc.job_id, status)
+    return status
+
+
+def read_ocr_result(doc: Optional[Document]) -> Optional[Dict]:
+    """Returns the ocr_summary dict / error dict once doc is final, else None."""
+    if not doc:
+        return None
+    if doc.status == "completed":
+        return json.loads(doc.ocr_summary) if doc.ocr_summary else {}
+    if doc.status == "failed":
+        return {"error": f"OCR failed for job {doc.job_id}"}
+    return None
+
+
+async def list_citizen_documents(db: AsyncSession, citizen_id: int) -> List[Document]:
+    result = await db.execute(select(Document).where(Document.citizen_id == citizen_id))
+    return result.scalars().all()
@@ -1,5 +1,6 @@
 from typing import Dict, Any
 import httpx
+from app.core.progress import emit_progress
 
 async def department_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -18,6 +19,7 @@ async def department_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         return state
         
     print(f"Department Agent: Retrieving {len(missing_docs)} missing documents...")
+    emit_progress(state, "department_fetch", f"Department Fetch: Retrieving {len(missing_docs)} missing document(s)...")
     
     # In a real microservice architecture, these would route differently.
     # Here we mock hitting our own simulated department API
@@ -26,7 +28,7 @@ async def department_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         still_missing = []
         
         for doc in missing_docs:
-            state["progress_log"].append(f"Department Fetch: Requesting {doc}...")
+            emit_progress(state, "department_fetch", f"Department Fetch: Requesting {doc}...")
             try:
                 # We simulate calling the API gateway for department services
                 response = await client.post(
@@ -38,16 +40,21 @@ async def department_agent(state: Dict[str, Any]) -> Dict[str, Any]:
                 if response.status_code == 200:
                     data = response.json()
                     newly_fetched.append(data.get("document_type", doc))
-                    state["progress_log"].append(f"Department Fetch: Successfully retrieved {doc}.")
+                    emit_progress(state, "department_fetch", f"Department Fetch: Successfully retrieved {doc}.", "completed")
                 else:
                     still_missing.append(doc)
-                    state["progress_log"].append(f"Department Fetch: Failed to get {doc}.")
+                    emit_progress(state, "department_fetch", f"Department Fetch: Failed to get {doc}.", "failed")
             except Exception as e:
                 still_missing.append(doc)
-                state["progress_log"].append(f"Department Fetch: Error retrieving {doc} - {str(e)[:50]}")
+                emit_progress(state, "department_fetch", f"Department Fetch: Error retrieving {doc} - {str(e)[:50]}", "failed")
                 
         # Update the state collections
         state["collected_documents"].extend(newly_fetched)
         state["missing_documents"] = still_missing
+        emit_progress(
+            state, "department_fetch",
+            f"Department Fetch: Finished — {len(newly_fetched)} retrieved, {len(still_missing)} still missing.",
+            "completed" if not still_missing else "failed"
+        )
 
     return state
@@ -1,11 +1,82 @@
-from typing import Dict, Any
-from app.core.llm import get_llm
-from app.core.retriever import get_relevant_policy_context, get_regulations_for_document_content
+import asyncio
+from typing import Dict, Any, Tuple
+from app.core.llm import get_llm, ainvoke_limited, estimate_tokens
+from app.core.retriever import get_relevant_policy_context, get_regulations_for_documents_batch
 from app.tools.vault_tool import _get_requirement_summary_string
+from app.core.progress import emit_progress
+from app.core.config import settings
+from app.core.corpus import get_corpus_version
+from app.core.compliance_cache import compliance_cache, make_compliance_key
+from app.db.session import async_session
 from langchain_core.prompts import PromptTemplate
 import json
 
 
+COMPLIANCE_TEMPLATE = """
+        You are a government compliance officer reviewing a submitted document.
+
+        Requirement: {req_name}
+        Document Summary: {summary}
+
+        Relevant Policy/Regulations:
+        ---
+        {policy_context}
+        ---
+
+        Based on the above, respond ONLY with a JSON:
+        {{
+            "compliant": true or false,
+            "status": "compliant" | "review_needed" | "non_compliant",
+            "notes": "brief explanation of compliance assessment"
+        }}
+        """
+COMPLIANCE_PROMPT = PromptTemplate.from_template(COMPLIANCE_TEMPLATE)
+
+
+def _parse_compliance_response(content: str) -> Tuple[Dict[str, Any], bool]:
+    """Returns (verdict, parsed); parsed is False when the raw reply had to be used as notes."""
+    try:
+        return json.loads(content), True
+    except Exception:
+        start = content.find("{")
+        end = content.rfind("}") + 1
+        try:
+            return json.loads(content[start:end]), True
+        except Exception:
+            return {"compliant": True, "status": "review_needed", "notes": content}, False
+
+
+def _requirement_summary(req_name: str, vault_summaries: Dict[str, Any],
+                         llm_requirement_summaries: Dict[str, str]) -> str:
+    summary_raw = llm_requirement_summaries.get(req_name) or vault_summaries.get(req_name)
+    if isinstance(summary_raw, str):
+        summary = summary_raw
+    elif summary_raw:
+        summary = _get_requirement_summary_string(summary_raw, req_name)
+    else:
+        summary = "NOT PROVIDED"
+    if not summary or (isinstance(summary, str) and summary.strip() == ""):
+        summary = "NOT PROVIDED"
+    return summary
+
+
+async def _assess_requirement(chain, req_name: str, summary: str, policy_context: str) -> Tuple[Dict[str, Any], bool]:
+    """Asks the LLM for a compliance verdict on one requirement given its retrieved regulations."""
+    inputs = {
+        "req_name": req_name,
+        "summary": summary,
+        "policy_context": policy_context or "No specific regulations found."
+    }
+    try:
+        response = await ainvoke_limited(
+            chain, inputs, estimate_tokens(COMPLIANCE_TEMPLATE + summary + inputs["policy_context"])
+        )
+    except asyncio.TimeoutError:
+        return {"compliant": False, "status": "review_needed", "notes": "Compliance check timed out."}, False
+
+    return _parse_compliance_response(response.content)
+
+
 async def cross_check_vault_with_regulations(
     vault_summaries: Dict[str, Any],
     llm_requirement_summaries: Dict[str, str],
@@ -14,77 +85,75 @@ async def cross_check_vault_with_regulations(
 ) -> Dict[str, Dict[str, Any]]:
     """
     Cross-checks vault output against regulations/laws using the vector DB.
-    For each requirement, uses the document content to retrieve relevant policy chunks,
-    then assesses compliance. Returns the compliance report (output of the RAG cross-check).
+    Verdicts are looked up first in the compliance cache (keyed by requirement, summary
+    hash, scheme, model and policy-corpus version); only misses are re-assessed.
+    Regulations for the remaining documents are retrieved in one batch (one embedding
+    pass, one SQL round trip); requirements are then assessed concurrently with LLM
+    calls going through the provider limiter (LLM_MAX_IN_FLIGHT / LLM_TOKENS_PER_MINUTE).
+    Returns the compliance report (output of the RAG cross-check) in requirement order.
     """
-    llm = get_llm()
     compliance_report = {}
+    submitted = []
 
     for req in requirements:
         req_name = req["name"]
-        summary_raw = llm_requirement_summaries.get(req_name) or vault_summaries.get(req_name)
-        if isinstance(summary_raw, str):
-            summary = summary_raw
-        elif summary_raw:
-            summary = _get_requirement_summary_string(summary_raw, req_name)
-        else:
-            summary = "NOT PROVIDED"
-        if not summary or (isinstance(summary, str) and summary.strip() == ""):
-            summary = "NOT PROVIDED"
-
+        summary = _requirement_summary(req_name, vault_summaries, llm_requirement_summaries)
         if summary == "NOT PROVIDED":
             compliance_report[req_name] = {
                 "compliant": False,
                 "status": "missing",
                 "notes": "Document was not submitted."
             }
-            continue
-
-        policy_context = await get_regulations_for_document_content(
-            document_content=summary,
-            requirement_name=req_name,
-            scheme_id=scheme_id,
-            top_k=5,
-        )
-
-        template = """
-        You are a government compliance officer reviewing a submitted document.
-
-        Requirement: {req_name}
-        Document Summary: {summary}
-
-        Relevant Policy/Regulations:
-        ---
-        {policy_context}
-        ---
+        else:
+            compliance_report[req_name] = None
+            submitted.append((req_name, summary))
+
+    if not submitted:
+        return compliance_report
+
+    async with async_session() as db:
+        corpus_version = await get_corpus_version(db)
+    keys = [
+        make_compliance_key(req_name, summary, scheme_id, settings.LLM_MODEL, corpus_version)
+        for req_name, summary in submitted
+    ]
+    cached = await compliance_cache.get_many(keys)
+
+    pending = []
+    for (req_name, summary), key in zip(submitted, keys):
+        if key in cached:
+            compliance_report[req_name] = cached[key]
+        else:
+            pending.append((req_name, summary, key))
 
-        Based on the above, respond ONLY with a JSON:
-        {{
-            "compliant": true or false,
-            "status": "compliant" | "review_needed" | "non_compliant",
-            "notes": "brief explanation of compliance assessment"
-        }}
-        """
-        prompt = PromptTemplate.from_template(template)
-        chain = prompt | llm
-        response = await chain.ainvoke({
-            "req_name": req_name,
-            "summary": summary,
-            "policy_context": policy_context or "No specific regulations found."
-        })
+    if not pending:
+        return compliance_report
 
-        try:
-            parsed = json.loads(response.content)
-        except Exception:
-            content = response.content
-            start = content.find("{")
-            end = content.rfind("}") + 1
-            try:
-                parsed = json.loads(content[start:end])
-            except Exception:
-                parsed = {"compliant": True, "status": "review_needed", "notes": content}
+    policy_contexts = await get_regulations_for_documents_batch(
+        [(summary, req_name) for req_name, summary, _ in pending],
+        scheme_id=scheme_id,
+        top_k=5,
+    )
 
-        compliance_report[req_name] = parsed
+    chain = COMPLIANCE_PROMPT | get_llm()
+    results = await asyncio.gather(*(
+        _assess_requirement(chain, req_name, summary, policy_context)
+        for (req_name, summary, _), policy_context in zip(pending, policy_contexts)
+    ))
+
+    to_cache = []
+    for (req_name, _, key), (verdict, parsed) in zip(pending, results):
+        compliance_report[req_name] = verdict
+        if parsed:
+            to_cache.append({
+                "cache_key": key,
+                "requirement_name": req_name,
+                "scheme_id": scheme_id,
+                "model_name": settings.LLM_MODEL,
+                "corpus_version": corpus_version,
+                "verdict": verdict,
+            })
+    await compliance_cache.put_many(to_cache)
 
     return compliance_report
 
@@ -102,6 +171,7 @@ async def explanation_tool(state: Dict[str, Any]) -> Dict[str, Any]:
     llm_summaries = state.get("llm_requirement_summaries", {})
 
     print("Explanation Tool: Cross-checking vault response with regulations (vector DB)...")
+    emit_progress(state, "explanation", f"Compliance: Cross-checking {len(requirements)} requirement(s) with regulations...")
     compliance_report = await cross_check_vault_with_regulations(
         vault_summaries=vault_summaries,
         llm_requirement_summaries=llm_summaries,
@@ -111,6 +181,7 @@ async def explanation_tool(state: Dict[str, Any]) -> Dict[str, Any]:
     state["compliance_report"] = compliance_report
 
     if result.get("status") == "rejected":
+        emit_progress(state, "explanation", "Compliance: Drafting rejection explanation...")
         llm = get_llm()
         policy_context = await get_relevant_policy_context(query=reason, scheme_id=scheme_id)
         template = """
@@ -127,11 +198,14 @@ async def explanation_tool(state: Dict[str, Any]) -> Dict[str, Any]:
         """
         prompt = PromptTemplate.from_template(template)
         chain = prompt | llm
-        explanation_response = await chain.ainvoke({
+        inputs = {
             "reason": reason,
             "policy_context": policy_context or "No specific policy excerpt found."
-        })
+        }
+        explanation_response = await ainvoke_limited(
+            chain, inputs, estimate_tokens(template + reason + inputs["policy_context"])
+        )
         state["eligibility_result"]["explanation"] = explanation_response.content
 
-    state["progress_log"].append("Compliance assessment complete.")
+    emit_progress(state, "explanation", "Compliance assessment complete.", "completed")
     return state
@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from app.core.progress import emit_progress
 
 async def notification_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -10,6 +11,7 @@ async def notification_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     app_id = state.get("citizen_id", "Unknown")
     result = state.get("eligibility_result", {})
+    emit_progress(state, "notification", "Notification: Preparing final notification...")
     
     print("\n" + "="*50)
     print(f"NOTIFICATION FOR CITIZEN: {app_id}")
@@ -25,5 +27,5 @@ async def notification_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         
     print("="*50 + "\n")
     
-    state["progress_log"].append("Final notification sent to citizen.")
+    emit_progress(state, "notification", "Final notification sent to citizen.", "completed")
     return state
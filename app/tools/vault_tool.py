@@ -1,15 +1,23 @@
 import json
 import asyncio
+import contextlib
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
-from sqlalchemy import select
 from app.db.session import async_session
-from app.db.models import Document, Citizen
+from app.db.models import Citizen
+from app.services import document_service
+from app.services.document_service import DocumentServiceError
+from app.core.config import settings
+from app.core.progress import emit_progress
+from app.core.ocr_events import ocr_waiters
 
-INTERNAL_API = "http://127.0.0.1:8000/api/v1/documents"
-OCR_POLL_INTERVAL = 4
-OCR_POLL_TIMEOUT = 120
+OCR_WAIT_TIMEOUT = 120
+# The row is re-read at least this often, in case the NOTIFY is lost (listener reconnecting)
+OCR_POLL_INTERVAL = 3.0
+
+_vault_semaphore: Optional[asyncio.Semaphore] = None
+_ocr_mode_semaphores: Dict[str, asyncio.Semaphore] = {}
 
 
 def _blueprint_result_to_rag_json(requirement_name: str, doc_type_slug: str, result: Any) -> Dict:
@@ -48,154 +56,190 @@ def _get_requirement_summary_string(vault_entry: Dict, req_name: str) -> str:
     return "\n".join(lines) if lines else str(inner)
 
 
-async def _poll_for_ocr(job_id: str) -> Dict:
-    """
-    Polls GET /documents/status/{job_id} until status is 'completed' or 'failed'.
-    Returns the ocr_summary dict if completed, else an error dict.
-    """
-    elapsed = 0
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        while elapsed < OCR_POLL_TIMEOUT:
-            resp = await client.get(f"{INTERNAL_API}/status/{job_id}")
-            if resp.status_code == 200:
-                data = resp.json()
-                if data["status"] == "completed":
-                    return data.get("ocr_summary") or {}
-                if data["status"] == "failed":
-                    return {"error": f"OCR failed for job {job_id}"}
-            await asyncio.sleep(OCR_POLL_INTERVAL)
-            elapsed += OCR_POLL_INTERVAL
-    return {"error": f"OCR timed out after {OCR_POLL_TIMEOUT}s for job {job_id}"}
+async def _read_ocr_result(job_id: str) -> Optional[Dict]:
+    """Returns the ocr_summary dict / error dict once the job is final, else None."""
+    async with async_session() as db:
+        doc = await document_service.get_document_by_job_id(db, job_id)
+    return document_service.read_ocr_result(doc)
 
 
-async def vault_tool(state: Dict[str, Any]) -> Dict[str, Any]:
+async def _wait_for_ocr(job_id: str) -> Dict:
     """
-    Vault Tool
-
-    For each requirement:
-    1. Checks if a completed Document already exists for this citizen + requirement.
-       → If yes: reuses the stored ocr_summary (shows 'already exists').
-    2. If no completed document: uploads the file via POST /documents/upload
-       which calls the real Tesseract Lambda and stores the job_id.
-    3. Polls GET /documents/status/{job_id} until the OCR webhook fires.
-    4. Collects all OCR summaries as vault_summaries for downstream RAG.
-
-    State in:  aadhar_number, requirements, uploaded_files
-    State out: vault_summaries {req_name: rag_json}, collected_documents, missing_documents
+    Waits for the OCR webhook of job_id to land (in-process signal or Postgres NOTIFY),
+    then returns the ocr_summary dict if completed, else an error dict.
+    The waiter is registered before the first status read so a webhook racing the
+    upload cannot be missed; the row is also re-read every OCR_POLL_INTERVAL seconds.
     """
-    aadhar = state.get("aadhar_number", "")
-    requirements = state.get("requirements", [])
-    uploaded_files: Dict[str, bytes] = state.get("uploaded_files", {})
-
-    vault_summaries = {}
-    collected = []
-    missing = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + OCR_WAIT_TIMEOUT
+    future = ocr_waiters.register(job_id)
+    try:
+        while True:
+            rag_json = await _read_ocr_result(job_id)
+            if rag_json is not None:
+                return rag_json
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if future.done():
+                # Signalled but the row still reads as pending: re-arm for the next signal
+                ocr_waiters.unregister(job_id, future)
+                future = ocr_waiters.register(job_id)
+            await ocr_waiters.wait(future, min(remaining, OCR_POLL_INTERVAL))
+    finally:
+        ocr_waiters.unregister(job_id, future)
+    return {"error": f"OCR timed out after {OCR_WAIT_TIMEOUT}s for job {job_id}"}
+
+
+def _get_vault_semaphores() -> Tuple[asyncio.Semaphore, Dict[str, asyncio.Semaphore]]:
+    """Lazily creates the process-wide vault concurrency limits (global + per ocr_mode)."""
+    global _vault_semaphore, _ocr_mode_semaphores
+    if _vault_semaphore is None:
+        _vault_semaphore = asyncio.Semaphore(settings.VAULT_CONCURRENCY)
+        _ocr_mode_semaphores = {
+            mode: asyncio.Semaphore(limit)
+            for mode, limit in settings.VAULT_OCR_MODE_CONCURRENCY.items()
+        }
+    return _vault_semaphore, _ocr_mode_semaphores
 
-    async with async_session() as db:
-        citizen_result = await db.execute(
-            select(Citizen).where(Citizen.aadhar_number == aadhar)
-        )
-        citizen = citizen_result.scalars().first()
 
-    if not citizen:
-        state["vault_summaries"] = {}
-        state["progress_log"].append("Vault: Citizen not found.")
-        return state
+async def _process_requirement(
+    state: Dict[str, Any],
+    citizen: Citizen,
+    req: Dict[str, Any],
+    uploaded_files: Dict[str, bytes],
+) -> Tuple[Dict, bool]:
+    """
+    Resolves one requirement to its RAG json.
+    Returns (rag_json, collected) where collected is False for missing/failed documents.
+    """
+    req_id   = req["id"]
+    req_name = req["name"]
+    ocr_mode = req.get("ocr_mode", "tesseract")
 
-    for req in requirements:
-        req_id   = req["id"]
-        req_name = req["name"]
+    global_limit, mode_limits = _get_vault_semaphores()
+    mode_limit = mode_limits.get(ocr_mode)
 
-        state["progress_log"].append(f"Vault: Checking '{req_name}'...")
+    # Per-mode slot first: a requirement queued behind its mode limit must not hold a global slot
+    async with (mode_limit or contextlib.nullcontext()), global_limit:
+        emit_progress(state, "vault", f"Vault: Checking '{req_name}'...")
 
         async with async_session() as db:
-            existing_result = await db.execute(
-                select(Document).where(
-                    Document.citizen_id == citizen.id,
-                    Document.requirement_id == req_id,
-                    Document.status == "completed"
-                )
-            )
-            existing_doc = existing_result.scalars().first()
+            existing_doc = await document_service.get_completed_document(db, citizen.id, req_id)
 
         if existing_doc and existing_doc.ocr_summary:
-            vault_summaries[req_name] = json.loads(existing_doc.ocr_summary)
-            collected.append(req_name)
-            state["progress_log"].append(
-                f"Vault: '{req_name}' already processed ✔  (reusing existing document)"
+            emit_progress(
+                state, "vault",
+                f"Vault: '{req_name}' already processed ✔  (reusing existing document)",
+                "completed"
             )
-            continue
+            return json.loads(existing_doc.ocr_summary), True
 
         file_bytes = uploaded_files.get(req_name)
         if not file_bytes:
-            missing.append(req_name)
-            vault_summaries[req_name] = {"error": "NOT PROVIDED"}
-            state["progress_log"].append(f"Vault: '{req_name}' not uploaded — skipped.")
-            continue
+            emit_progress(state, "vault", f"Vault: '{req_name}' not uploaded — skipped.", "failed")
+            return {"error": "NOT PROVIDED"}, False
 
-        ocr_mode = req.get("ocr_mode", "tesseract")
         dt = req.get("doc_type")
         doc_type_slug = (getattr(dt, "slug", None) if dt is not None else None) or (dt.get("slug") if isinstance(dt, dict) else None) or ""
 
         if ocr_mode == "llm_vision":
-            state["progress_log"].append(f"Vault: Extracting '{req_name}' via Bedrock vision...")
+            emit_progress(state, "vault", f"Vault: Extracting '{req_name}' via Bedrock vision...")
             try:
                 from app.core.bedrock import analyze_blueprint_pdf, analyze_blueprint_image
                 prompt = "Extract key information: dimensions, structural components, and any compliance issues."
+                # Bedrock calls are blocking; keep them off the event loop so other requirements progress.
                 if file_bytes[:4] == b"%PDF":
-                    blueprint_result = analyze_blueprint_pdf(file_bytes, prompt)
+                    blueprint_result = await asyncio.to_thread(analyze_blueprint_pdf, file_bytes, prompt)
                 else:
-                    blueprint_result = analyze_blueprint_image(file_bytes, prompt)
+                    blueprint_result = await asyncio.to_thread(analyze_blueprint_image, file_bytes, prompt)
                 rag_json = _blueprint_result_to_rag_json(req_name, doc_type_slug or "blueprint", blueprint_result)
-                vault_summaries[req_name] = rag_json
-                collected.append(req_name)
-                state["progress_log"].append(f"Vault: '{req_name}' Bedrock extraction complete.")
+                emit_progress(state, "vault", f"Vault: '{req_name}' Bedrock extraction complete.", "completed")
+                return rag_json, True
             except Exception as e:
-                vault_summaries[req_name] = {"error": str(e)}
-                missing.append(req_name)
-                state["progress_log"].append(f"Vault: '{req_name}' Bedrock error — {e}")
-            continue
-
-        state["progress_log"].append(f"Vault: Uploading '{req_name}' to Tesseract Lambda...")
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            upload_resp = await client.post(
-                f"{INTERNAL_API}/upload",
-                data={
-                    "citizen_aadhar": aadhar,
-                    "requirement_id": str(req_id)
-                },
-                files={"file": (f"{req_name}.pdf", file_bytes, "application/pdf")}
-            )
+                emit_progress(state, "vault", f"Vault: '{req_name}' Bedrock error — {e}", "failed")
+                return {"error": str(e)}, False
 
-        if upload_resp.status_code != 200:
-            missing.append(req_name)
-            vault_summaries[req_name] = {"error": f"Upload failed: {upload_resp.text[:120]}"}
-            state["progress_log"].append(f"Vault: Upload failed for '{req_name}'.")
-            continue
+        emit_progress(state, "vault", f"Vault: Uploading '{req_name}' to Tesseract Lambda...")
 
-        upload_data = upload_resp.json()
+        try:
+            async with async_session() as db:
+                upload_data = await document_service.upload_document(
+                    db, citizen, req_id, file_bytes, f"{req_name}.pdf"
+                )
+        except (DocumentServiceError, httpx.HTTPError) as e:
+            emit_progress(state, "vault", f"Vault: Upload failed for '{req_name}'.", "failed")
+            return {"error": f"Upload failed: {str(e)[:120]}"}, False
 
-        if upload_data.get("already_exists"):
-            job_id = upload_data["job_id"]
-        else:
-            job_id = upload_data.get("job_id")
+        job_id = upload_data.get("job_id")
 
-        state["progress_log"].append(f"Vault: '{req_name}' uploaded — job_id={job_id}. Waiting for OCR...")
+        emit_progress(state, "vault", f"Vault: '{req_name}' uploaded — job_id={job_id}. Waiting for OCR...")
 
-        rag_json = await _poll_for_ocr(job_id)
-        vault_summaries[req_name] = rag_json
+        rag_json = await _wait_for_ocr(job_id)
 
         if "error" not in rag_json:
-            collected.append(req_name)
-            state["progress_log"].append(f"Vault: '{req_name}' OCR complete.")
-        else:
-            missing.append(req_name)
-            state["progress_log"].append(f"Vault: '{req_name}' OCR error — {rag_json['error']}")
+            emit_progress(state, "vault", f"Vault: '{req_name}' OCR complete.", "completed")
+            return rag_json, True
+        emit_progress(state, "vault", f"Vault: '{req_name}' OCR error — {rag_json['error']}", "failed")
+        return rag_json, False
+
+
+async def vault_tool(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vault Tool
+
+    For each requirement (concurrently, bounded by VAULT_CONCURRENCY and
+    VAULT_OCR_MODE_CONCURRENCY):
+    1. Checks if a completed Document already exists for this citizen + requirement.
+       → If yes: reuses the stored ocr_summary (shows 'already exists').
+    2. If no completed document: uploads the file via document_service.upload_document
+       (in-process, shared with POST /documents/upload) which calls the real
+       Tesseract Lambda and stores the job_id.
+    3. Waits (no polling) until the OCR webhook for job_id fires.
+    4. Collects all OCR summaries as vault_summaries for downstream RAG.
+
+    collected_documents / missing_documents keep the order of `requirements`.
+
+    State in:  aadhar_number, requirements, uploaded_files
+    State out: vault_summaries {req_name: rag_json}, collected_documents, missing_documents
+    """
+    aadhar = state.get("aadhar_number", "")
+    requirements = state.get("requirements", [])
+    uploaded_files: Dict[str, bytes] = state.get("uploaded_files", {})
+
+    vault_summaries = {}
+    collected = []
+    missing = []
+
+    emit_progress(state, "vault", f"Vault: Started checking {len(requirements)} requirement(s).")
+
+    async with async_session() as db:
+        citizen = await document_service.get_citizen_by_aadhar(db, aadhar)
+
+    if not citizen:
+        state["vault_summaries"] = {}
+        emit_progress(state, "vault", "Vault: Citizen not found.", "failed")
+        return state
+
+    results = await asyncio.gather(*(
+        _process_requirement(state, citizen, req, uploaded_files)
+        for req in requirements
+    ))
+
+    for req, (rag_json, ok) in zip(requirements, results):
+        req_name = req["name"]
+        vault_summaries[req_name] = rag_json
+        (collected if ok else missing).append(req_name)
 
     state["vault_summaries"] = vault_summaries
     state["collected_documents"] = collected
     state["missing_documents"] = missing
+    emit_progress(
+        state, "vault",
+        f"Vault: Finished — {len(collected)} collected, {len(missing)} missing.",
+        "completed",
+        {"collected": collected, "missing": missing}
+    )
     state["llm_requirement_summaries"] = {
         req_name: _get_requirement_summary_string(vault_summaries.get(req_name, {}), req_name)
         for req_name in vault_summaries
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Benchmarks must be reproducible without network access: use the locally cached model only.
+if "--allow-download" not in sys.argv:
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.embeddings import load_embeddings_model
+from ingest_policies import (
+    CHUNK_OVERLAP, CHUNK_SIZE, POLICIES_DIR, doc_type_for, list_policy_files, load_file, make_text_splitter,
+    split_chunks,
+)
+
+QUERIES_FILE = Path(__file__).parent / "benchmarks" / "retrieval_queries.json"
+DEFAULT_OUTPUT = Path(__file__).parent / "benchmarks" / "results" / "retrieval.json"
+QUANTIZATIONS = ("none", "half", "bit")
+
+
+def build_corpus(policies_dir: Path, chunk_size: int, chunk_overlap: int):
+    """Extracts and splits every policy file exactly like ingest_policies.py does."""
+    splitter = make_text_splitter(chunk_size, chunk_overlap)
+    chunks = []
+    started = time.perf_counter()
+    for path in sorted(list_policy_files(policies_dir)):
+        content = load_file(path)
+        if not content or not content.strip():
+            continue
+        for i, (_, piece) in enumerate(split_chunks(splitter, content)):
+            chunks.append({"content": piece, "doc_type": doc_type_for(path), "source": path.name, "chunk": i})
+    return chunks, time.perf_counter() - started
+
+
+def embed(model, texts, batch_size: int):
+    vectors = []
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(model.embed_documents(texts[i:i + batch_size]))
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - started
+
+
+class LocalStore:
+    """
+    In-memory copy of policy_document for one benchmark run. search() mirrors the
+    retriever's vector mode: exact float32 L2 (as in the numpy backend / pgvector `<->`),
+    or a halfvec / binary-quantized candidate scan re-ranked by exact distance.
+    """
+
+    def __init__(self, matrix: np.ndarray, doc_types, quantization: str, rerank_candidates: int):
+        self.matrix = matrix
+        self.sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        self.doc_types = np.array([d or "" for d in doc_types], dtype=object)
+        self.quantization = quantization
+        self.rerank_candidates = rerank_candidates
+        self.half = matrix.astype(np.float16) if quantization == "half" else None
+        self.bits = matrix > 0 if quantization == "bit" else None
+
+    def _rows(self, doc_type):
+        return np.flatnonzero(self.doc_types == doc_type) if doc_type else np.arange(len(self.matrix))
+
+    @staticmethod
+    def _smallest(distances: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(distances))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(distances, k - 1)[:k]
+        return top[np.argsort(distances[top])]
+
+    def search(self, query: np.ndarray, doc_type, k: int) -> np.ndarray:
+        rows = self._rows(doc_type)
+        if self.quantization == "half":
+            compact = self.half[rows].astype(np.float32)
+            candidates = rows[self._smallest(((compact - query.astype(np.float16)) ** 2).sum(axis=1),
+                                             max(self.rerank_candidates, k))]
+        elif self.quantization == "bit":
+            hamming = (self.bits[rows] != (query > 0)).sum(axis=1)
+            candidates = rows[self._smallest(hamming, max(self.rerank_candidates, k))]
+        else:
+            candidates = rows
+        distances = self.sq_norms[candidates] - 2.0 * (self.matrix[candidates] @ query)
+        return candidates[self._smallest(distances, k)]
+
+    def exact(self, query: np.ndarray, doc_type, k: int) -> np.ndarray:
+        """Brute-force float64 ground truth."""
+        rows = self._rows(doc_type)
+        diffs = self.matrix[rows].astype(np.float64) - query.astype(np.float64)
+        return rows[self._smallest((diffs ** 2).sum(axis=1), k)]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def judge(query, hits, chunks):
+    """
+    Scores one query's top-k chunks against its labels: the share of relevant_sources
+    retrieved, whether any was, and the share of expected_passages found verbatim
+    (whitespace- and case-insensitive). Returns None for metrics the query has no labels for.
+    """
+    sources = {chunks[i]["source"] for i in hits}
+    relevant = set(query.get("relevant_sources", ()))
+    passages = query.get("expected_passages", ())
+    texts = [_normalize(chunks[i]["content"]) for i in hits]
+    return {
+        "source_recall": len(sources & relevant) / len(relevant) if relevant else None,
+        "hit": float(bool(sources & relevant)) if relevant else None,
+        "passage_recall": (
+            sum(any(_normalize(p) in t for t in texts) for p in passages) / len(passages) if passages else None
+        ),
+    }
+
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def percentiles(samples):
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    if not len(values):
+        return {"p50": None, "p95": None, "mean": None}
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "mean": round(float(values.mean()), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval latency / recall benchmark over policies/")
+    parser.add_argument("--policies-dir", type=Path, default=POLICIES_DIR)
+    parser.add_argument("--queries", type=Path, default=QUERIES_FILE, help="Labelled query set (JSON list)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedding-backend", default=settings.EMBEDDING_BACKEND)
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default=settings.VECTOR_QUANTIZATION)
+    parser.add_argument("--rerank-candidates", type=int, default=settings.RERANK_CANDIDATES)
+    parser.add_argument("--batch-size", type=int, default=64, help="Embedding batch size for the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the query set")
+    parser.add_argument("--allow-download", action="store_true", help="Let the embedding model be fetched from the Hub")
+    args = parser.parse_args()
+
+    queries = json.loads(args.queries.read_text(encoding="utf-8"))
+
+    started = time.perf_counter()
+    model = load_embeddings_model(args.embedding_backend)
+    model_load_seconds = time.perf_counter() - started
+
+    chunks, extract_seconds = build_corpus(args.policies_dir, args.chunk_size, args.chunk_overlap)
+    if not chunks:
+        print(f"No policy text found in {args.policies_dir}.")
+        return 1
+    print(f"Corpus: {len(chunks)} chunks from {len({c['source'] for c in chunks})} file(s)")
+    matrix, corpus_embed_seconds = embed(model, [c["content"] for c in chunks], args.batch_size)
+    store = LocalStore(matrix, [c["doc_type"] for c in chunks], args.quantization, args.rerank_candidates)
+
+    query_texts = [q["query"] for q in queries]
+    _, query_batch_seconds = embed(model, query_texts, args.batch_size)
+
+    embed_latency, search_latency, total_latency = [], [], []
+    recalls, judged = [], []
+    for _ in range(max(1, args.repeat)):
+        recalls, judged = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            vector = np.asarray(model.embed_documents([q["query"]])[0], dtype=np.float32)
+            t1 = time.perf_counter()
+            hits = store.search(vector, q.get("doc_type"), args.top_k)
+            t2 = time.perf_counter()
+            embed_latency.append(t1 - t0)
+            search_latency.append(t2 - t1)
+            total_latency.append(t2 - t0)
+
+            truth = store.exact(vector, q.get("doc_type"), args.top_k)
+            recalls.append(len(set(hits.tolist()) & set(truth.tolist())) / len(truth) if len(truth) else 1.0)
+            judged.append(judge(q, hits.tolist(), chunks))
+
+    by_category = {}
+    for q, scores in zip(queries, judged):
+        by_category.setdefault(q.get("category", "uncategorized"), []).append(scores)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "embedding_backend": args.embedding_backend,
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "top_k": args.top_k,
+            "quantization": args.quantization,
+            "rerank_candidates": args.rerank_candidates,
+            "queries": len(queries),
+            "repeat": args.repeat,
+        },
+        "corpus": {
+            "files": len({c["source"] for c in chunks}),
+            "chunks": len(chunks),
+            "extract_seconds": round(extract_seconds, 3),
+        },
+        "embedding": {
+            "model_load_seconds": round(model_load_seconds, 3),
+            "corpus_embeddings_per_second": round(len(chunks) / corpus_embed_seconds, 2),
+            "query_batch_embeddings_per_second": round(len(query_texts) / query_batch_seconds, 2),
+        },
+        "latency_ms": {
+            "embed": percentiles(embed_latency),
+            "search": percentiles(search_latency),
+            "total": percentiles(total_latency),
+        },
+        # Against the labels in the query set: reflects chunking, embedding model and search
+        f"source_recall_at_{args.top_k}": {
+            "overall": mean(j["source_recall"] for j in judged),
+            "by_category": {c: mean(j["source_recall"] for j in v) for c, v in sorted(by_category.items())},
+        },
+        f"hit_rate_at_{args.top_k}": mean(j["hit"] for j in judged),
+        f"passage_recall_at_{args.top_k}": mean(j["passage_recall"] for j in judged),
+        # Against exact search over the same chunks and vectors: only reflects quantization loss
+        # (always 1.0 with --quantization none)
+        f"ann_recall_at_{args.top_k}": round(float(np.mean(recalls)), 4),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"\nWritten to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from app.core.embeddings import load_embeddings_model
+
+POLICIES_DIR = Path(__file__).parent / "policies"
+
+SAMPLE_TEXTS = [
+    "Proof of residence issued by the local self-government body",
+    "Annual family income must not exceed the limit notified for the scheme.",
+    "Building permit: setback of 1.5 m from the plot boundary is mandatory (Rule 26).",
+    "Aadhaar card",
+    "",
+]
+
+
+def parity_texts(limit: int):
+    """Sample sentences plus the first paragraphs of the text policies in policies/."""
+    texts = list(SAMPLE_TEXTS)
+    for path in sorted(POLICIES_DIR.glob("*")):
+        if path.suffix.lower() not in (".txt", ".md"):
+            continue
+        paragraphs = [p.strip() for p in path.read_text(encoding="utf-8", errors="ignore").split("\n\n")]
+        texts += [p for p in paragraphs if p][:limit]
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Checks that the ONNX embedding backend reproduces the HuggingFace vectors"
+    )
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Fail if any text's cosine similarity falls below this (use ~0.97 for int8 models)")
+    parser.add_argument("--per-file", type=int, default=20, help="Paragraphs sampled from each policy file")
+    args = parser.parse_args()
+
+    texts = parity_texts(args.per_file)
+    reference = np.asarray(load_embeddings_model("huggingface").embed_documents(texts), dtype=np.float32)
+    candidate = np.asarray(load_embeddings_model("onnx").embed_documents(texts), dtype=np.float32)
+
+    if reference.shape != candidate.shape:
+        print(f"FAIL: shape mismatch {reference.shape} vs {candidate.shape}")
+        return 1
+
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    max_abs = np.abs(reference - candidate).max(axis=1)
+    worst = int(np.argmin(cosine))
+    print(f"{len(texts)} texts, dim={reference.shape[1]}")
+    print(f"cosine: min={cosine.min():.6f} mean={cosine.mean():.6f}")
+    print(f"max |diff|: {max_abs.max():.6f}")
+    if cosine[worst] < args.min_cosine:
+        print(f"FAIL: cosine {cosine[worst]:.6f} < {args.min_cosine} for {texts[worst][:80]!r}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,83 @@
+import argparse
 import asyncio
+import hashlib
 import sys
 import json
-import os
+import time
+import numpy as np
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.db.session import engine, init_db
-from app.db.models import PolicyDocument
+from app.core.corpus import bump_corpus_version
+from app.core.config import settings
+from app.core.vector_store import build_snapshot
+from app.core.vector_index import populate_quantized_columns, quantized_expressions
+from app.core.embeddings import load_embeddings_model
+from app.core.pdf_extract import count_pages, default_workers, extract_page_range, extract_pdf_pages
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 POLICIES_DIR = Path(__file__).parent / "policies"
 BATCH_SIZE = 50
+CHUNK_SIZE = 300
+CHUNK_OVERLAP = 40
+POLICY_SUFFIXES = (".txt", ".pdf", ".md")
+# Depth of the bounded queues between pipeline stages (files, then chunk batches)
+QUEUE_SIZE = 4
+PROGRESS_INTERVAL = 5.0
+
+# New chunks are COPYed (binary, vectors included) into a per-transaction staging table
+# and merged into policy_document with a single INSERT ... SELECT.
+STAGING_TABLE = "policy_chunk_staging"
+STAGING_COLUMNS = ("doc_type", "content", "embedding", "metadata_json", "source", "content_hash")
+
+CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        doc_type varchar(50),
+        content text NOT NULL,
+        embedding vector(384),
+        metadata_json varchar(500),
+        source varchar(255),
+        content_hash varchar(64)
+    ) ON COMMIT DROP
+""")
+
+MERGE_STAGING_SQL = text(f"""
+    INSERT INTO policy_document ({", ".join(STAGING_COLUMNS)})
+    SELECT {", ".join(STAGING_COLUMNS)} FROM {STAGING_TABLE}
+    ON CONFLICT (source, content_hash) DO NOTHING
+""")
+
+# With a quantization configured, the compact columns are derived in the same statement so
+# new chunks are reachable through the quantized index as soon as they are committed.
+MERGE_STAGING_QUANTIZED_SQL = text(f"""
+    INSERT INTO policy_document ({", ".join(STAGING_COLUMNS + tuple(quantized_expressions()))})
+    SELECT {", ".join(STAGING_COLUMNS + tuple(quantized_expressions().values()))} FROM {STAGING_TABLE}
+    ON CONFLICT (source, content_hash) DO NOTHING
+""")
+
+# Chunks that survive a file change keep their embedding; only their position is refreshed.
+UPDATE_CHUNK_SQL = text("""
+    UPDATE policy_document
+    SET doc_type = :doc_type, metadata_json = :metadata_json
+    WHERE source = :source AND content_hash = :content_hash
+""")
+
+DELETE_STALE_CHUNKS_SQL = text("""
+    DELETE FROM policy_document
+    WHERE source = :source AND NOT (content_hash = ANY(CAST(:hashes AS text[])))
+""")
+
+UPSERT_SOURCE_SQL = text("""
+    INSERT INTO policy_source (source, doc_type, file_hash, size, mtime, chunk_count)
+    VALUES (:source, :doc_type, :file_hash, :size, :mtime, :chunk_count)
+    ON CONFLICT (source) DO UPDATE
+    SET doc_type = EXCLUDED.doc_type, file_hash = EXCLUDED.file_hash, size = EXCLUDED.size,
+        mtime = EXCLUDED.mtime, chunk_count = EXCLUDED.chunk_count, updated_at = CURRENT_TIMESTAMP
+""")
 
 def sanitize_text(text: str) -> str:
     """Remove null bytes and other problematic characters for PostgreSQL UTF-8."""
@@ -21,21 +86,32 @@ def sanitize_text(text: str) -> str:
 def load_text_file(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="ignore")
 
-def load_pdf_file(path: Path) -> str:
+def join_pdf_pages(path: Path, pages) -> Optional[str]:
+    """
+    Reassembles (page_number, text, error) results in page order, reporting failed pages.
+    Returns None when every page failed, so the file is not mistaken for an empty one.
+    """
+    texts, failed = [], 0
+    for number, txt, error in sorted(pages, key=lambda p: p[0]):
+        if error:
+            failed += 1
+            print(f"  [WARNING] {path.name}: page {number + 1} could not be extracted ({error})")
+        elif txt and sanitize_text(txt):
+            texts.append(sanitize_text(txt))
+    if pages and failed == len(pages):
+        return None
+    return "\n".join(texts)
+
+def load_pdf_file(path: Path) -> Optional[str]:
     try:
-        from pypdf import PdfReader
-        reader = PdfReader(str(path))
-        pages = []
-        for page in reader.pages:
-            txt = page.extract_text()
-            if txt:
-                pages.append(sanitize_text(txt))
-        return "\n".join(pages)
+        import pypdf  # noqa: F401
     except ImportError:
         print(f"  [WARNING] pypdf not installed. Skipping {path.name}. Run: pip install pypdf")
-        return ""
+        return None
+    return join_pdf_pages(path, extract_page_range(str(path), 0, count_pages(str(path))))
 
-def load_file(path: Path) -> str:
+def load_file(path: Path) -> Optional[str]:
+    """Text of one policy file; None when it could not be read (as opposed to "" for an empty file)."""
     suffix = path.suffix.lower()
     if suffix in (".txt", ".md"):
         return sanitize_text(load_text_file(path))
@@ -43,85 +119,454 @@ def load_file(path: Path) -> str:
         return load_pdf_file(path)
     else:
         print(f"  [SKIP] Unsupported file type: {path.name}")
-        return ""
+        return None
+
+async def load_file_async(path: Path, executor, workers: int) -> Optional[str]:
+    """load_file with PDF page ranges extracted in parallel on the process pool."""
+    if path.suffix.lower() != ".pdf":
+        try:
+            return await asyncio.to_thread(load_file, path)
+        except OSError as e:
+            print(f"  [WARNING] Could not read {path.name}: {e}")
+            return None
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print(f"  [WARNING] pypdf not installed. Skipping {path.name}. Run: pip install pypdf")
+        return None
+    try:
+        pages = await extract_pdf_pages(path, executor, workers)
+    except Exception as e:
+        print(f"  [WARNING] Could not open {path.name}: {e}")
+        return None
+    return join_pdf_pages(path, pages)
+
+def doc_type_for(path: Path):
+    raw_stem = path.stem.upper()
+    # Use first part of stem as doc_type (e.g. ADMIN_PANEL_CONTEXT -> ADMIN, GHS_xyz -> GHS)
+    return raw_stem.split("_")[0] if "_" in raw_stem else (raw_stem if raw_stem else None)
+
+def list_policy_files(policies_dir: Path = POLICIES_DIR):
+    return [
+        f for f in policies_dir.iterdir()
+        if f.is_file() and f.suffix.lower() in POLICY_SUFFIXES and f.name != ".gitkeep"
+    ]
+
+def make_text_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
 
 async def setup_vector_extension():
     async with engine.begin() as conn:
         print("Ensuring pgvector extension is installed...")
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
 
-async def ingest_file(embeddings_model, text_splitter, path: Path):
-    print(f"\n  Processing: {path.name}")
-    content = load_file(path)
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    if not content.strip():
-        print(f"  [SKIP] Empty or unreadable: {path.name}")
-        return 0
+def chunk_hash(content: str) -> str:
+    # Same value as encode(sha256(convert_to(content, 'UTF8')), 'hex') used by the backfill migration
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-    raw_stem = path.stem.upper()
-    # Use first part of stem as doc_type (e.g. ADMIN_PANEL_CONTEXT -> ADMIN, GHS_xyz -> GHS)
-    doc_type_value = raw_stem.split("_")[0] if "_" in raw_stem else (raw_stem if raw_stem else None)
-
-    chunks = text_splitter.split_text(content)
-    # Sanitize each chunk individually
-    chunks = [sanitize_text(c) for c in chunks if sanitize_text(c)]
-    
-    total = 0
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch = chunks[i : i + BATCH_SIZE]
-        vectors = embeddings_model.embed_documents(batch)
-        
-        async with AsyncSession(engine) as session:
-            for idx, chunk in enumerate(batch):
-                doc = PolicyDocument(
-                    doc_type=doc_type_value,
-                    content=chunk,
-                    embedding=vectors[idx],
-                    metadata_json=json.dumps({"source": path.name, "chunk": i + idx})
+async def load_manifest():
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT source, file_hash, size, mtime FROM policy_source"))
+        return {source: {"file_hash": h, "size": size, "mtime": mtime} for source, h, size, mtime in result.fetchall()}
+
+def plan_sources(policy_files, manifest, full: bool = False):
+    """
+    Compares policies/ with the policy_source manifest. Files whose size and mtime match
+    are skipped without being read; otherwise the file hash decides whether the content
+    actually changed. Returns (changed, touched, unchanged, removed).
+    """
+    changed, touched, unchanged = [], [], []
+    for path in policy_files:
+        stat = path.stat()
+        entry = manifest.get(path.name)
+        if entry and not full and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            unchanged.append(path)
+            continue
+        file_hash = file_sha256(path)
+        info = {"path": path, "file_hash": file_hash, "size": stat.st_size, "mtime": stat.st_mtime}
+        if entry and entry["file_hash"] == file_hash and not full:
+            touched.append(info)
+        else:
+            changed.append(info)
+    present = {path.name for path in policy_files}
+    removed = sorted(source for source in manifest if source not in present)
+    return changed, touched, unchanged, removed
+
+def split_chunks(text_splitter, content: str):
+    """Sanitized chunks of one file, without repeats, with their content hashes."""
+    chunks, seen = [], set()
+    for chunk in text_splitter.split_text(content):
+        chunk = sanitize_text(chunk)
+        if not chunk:
+            continue
+        digest = chunk_hash(chunk)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        chunks.append((digest, chunk))
+    return chunks
+
+async def stored_hashes(source: str):
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT content_hash FROM policy_document WHERE source = :source"), {"source": source}
+        )
+        return {row[0] for row in result.fetchall()}
+
+async def stage_chunks(conn, records):
+    """
+    Binary-COPYs chunk records (tuples in STAGING_COLUMNS order, embeddings as float32
+    arrays) into the staging table of conn's transaction through asyncpg.
+    """
+    if not records:
+        return
+    await conn.execute(CREATE_STAGING_SQL)
+    # The asyncpg connection has the binary pgvector codec registered (app/db/session.py)
+    raw = (await conn.get_raw_connection()).driver_connection
+    await raw.copy_records_to_table(STAGING_TABLE, records=records, columns=STAGING_COLUMNS)
+
+async def merge_staged_chunks(conn, quantize: bool = False) -> int:
+    """Moves staged chunks into policy_document in one statement; returns rows inserted."""
+    await conn.execute(CREATE_STAGING_SQL)
+    inserted = (await conn.execute(MERGE_STAGING_QUANTIZED_SQL if quantize else MERGE_STAGING_SQL)).rowcount
+    await conn.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+    return inserted
+
+class StageStats:
+    """Counters behind the per-stage progress and throughput readout."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.busy = 0.0
+        self.started = time.monotonic()
+
+    def add(self, count: int, seconds: float = 0.0):
+        self.count += count
+        self.busy += seconds
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        line = f"{self.name}: {self.count} {self.unit} ({self.count / elapsed:.1f}/s"
+        if self.busy:
+            line += f", {self.count / self.busy:.1f}/s busy"
+        return line + ")"
+
+async def extract_stage(changed, workers: int, out_queue, stats: StageStats, failed):
+    """
+    Runs up to `workers` extractor tasks that pull files from a queue (PDF pages on a
+    process pool) and hand (info, content) downstream as each file finishes. Extractors
+    block on the bounded out_queue, so extraction never runs more than `workers` files
+    ahead of the splitter. Files that could not be read are recorded in failed and
+    dropped here, so their stored chunks and manifest row are left untouched.
+    """
+    files = asyncio.Queue()
+    for info in changed:
+        files.put_nowait(info)
+
+    async def extractor(executor):
+        while True:
+            try:
+                info = files.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            content = await load_file_async(info["path"], executor, workers)
+            stats.add(1)
+            if content is None:
+                failed.append(info["path"].name)
+                continue
+            await out_queue.put((info, content))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        extractors = [asyncio.create_task(extractor(executor)) for _ in range(max(1, min(workers, len(changed))))]
+        try:
+            await asyncio.gather(*extractors)
+        except BaseException:
+            for task in extractors:
+                task.cancel()
+            await asyncio.gather(*extractors, return_exceptions=True)
+            raise
+    await out_queue.put(None)
+
+async def split_stage(text_splitter, in_queue, out_queue, stats: StageStats):
+    """
+    Splits each extracted file and looks up which chunk hashes are already stored.
+    Emits ("start", plan), ("batch", plan, new_chunks) per BATCH_SIZE new chunks, ("end", plan).
+    """
+    while (item := await in_queue.get()) is not None:
+        info, content = item
+        path = info["path"]
+        if not content.strip():
+            print(f"  [WARNING] Empty file: {path.name}; its stored chunks will be removed")
+        started = time.monotonic()
+        chunks = await asyncio.to_thread(split_chunks, text_splitter, content) if content.strip() else []
+        stats.add(len(chunks), time.monotonic() - started)
+
+        stored = await stored_hashes(path.name)
+        plan = {
+            "info": info,
+            "doc_type": doc_type_for(path),
+            "hashes": [digest for digest, _ in chunks],
+            "kept": [(i, digest) for i, (digest, _) in enumerate(chunks) if digest in stored],
+        }
+        new_chunks = [(i, digest, chunk) for i, (digest, chunk) in enumerate(chunks) if digest not in stored]
+        await out_queue.put(("start", plan))
+        for i in range(0, len(new_chunks), BATCH_SIZE):
+            await out_queue.put(("batch", plan, new_chunks[i : i + BATCH_SIZE]))
+        await out_queue.put(("end", plan))
+    await out_queue.put(None)
+
+async def embed_stage(embeddings_model, executor, in_queue, out_queue, stats: StageStats):
+    """Embeds new-chunk batches on the dedicated embedding executor; passes markers through."""
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not None:
+        if item[0] == "batch":
+            _, plan, batch = item
+            source = plan["info"]["path"].name
+            started = time.monotonic()
+            vectors = await loop.run_in_executor(
+                executor, embeddings_model.embed_documents, [chunk for _, _, chunk in batch]
+            )
+            stats.add(len(batch), time.monotonic() - started)
+            item = ("batch", plan, [
+                (
+                    plan["doc_type"],
+                    chunk,
+                    np.asarray(vector, dtype=np.float32),
+                    json.dumps({"source": source, "chunk": i}),
+                    source,
+                    digest,
                 )
-                session.add(doc)
-            await session.commit()
-        
-        total += len(batch)
-        print(f"    Committed batch {i // BATCH_SIZE + 1}: {total}/{len(chunks)} chunks")
+                for (i, digest, chunk), vector in zip(batch, vectors)
+            ])
+        await out_queue.put(item)
+    await out_queue.put(None)
 
-    print(f"  Done: {total} chunks from {path.name} (doc_type={doc_type_value})")
-    return total
+async def write_stage(in_queue, stats: StageStats, totals, quantize: bool = False):
+    """
+    Writes one file per transaction: embedded batches are COPYed into the staging table
+    as they arrive (overlapping the next batch's embedding); at the file's end, stale
+    chunks are deleted, staged ones merged, kept ones re-positioned and the manifest
+    upserted before the commit, so retrieval never sees a half-updated source.
+    """
+    conn = None
+    try:
+        while (item := await in_queue.get()) is not None:
+            kind, plan = item[0], item[1]
+            info = plan["info"]
+            source = info["path"].name
+            if kind == "start":
+                conn = await engine.connect()
+                await conn.begin()
+                continue
+            if kind == "batch":
+                started = time.monotonic()
+                await stage_chunks(conn, item[2])
+                stats.add(len(item[2]), time.monotonic() - started)
+                continue
+
+            started = time.monotonic()
+            deleted = (await conn.execute(
+                DELETE_STALE_CHUNKS_SQL, {"source": source, "hashes": plan["hashes"]}
+            )).rowcount
+            inserted = await merge_staged_chunks(conn, quantize)
+            if plan["kept"]:
+                await conn.execute(UPDATE_CHUNK_SQL, [
+                    {
+                        "doc_type": plan["doc_type"],
+                        "metadata_json": json.dumps({"source": source, "chunk": i}),
+                        "source": source,
+                        "content_hash": digest,
+                    }
+                    for i, digest in plan["kept"]
+                ])
+            await conn.execute(UPSERT_SOURCE_SQL, {
+                "source": source, "doc_type": plan["doc_type"], "file_hash": info["file_hash"],
+                "size": info["size"], "mtime": info["mtime"], "chunk_count": len(plan["hashes"]),
+            })
+            await conn.commit()
+            await conn.close()
+            conn = None
+            stats.busy += time.monotonic() - started
+
+            totals["inserted"] += inserted
+            totals["deleted"] += deleted
+            totals["kept"] += len(plan["kept"])
+            print(f"  Done: {source} (doc_type={plan['doc_type']}): "
+                  f"{inserted} new, {len(plan['kept'])} unchanged, {deleted} removed chunks")
+    finally:
+        if conn is not None:
+            await conn.close()
+
+async def report_progress(stats, queues, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        depth = ", ".join(f"{name} {q.qsize()}/{q.maxsize}" for name, q in queues.items())
+        print("  [progress] " + " | ".join(s.line() for s in stats) + f" | queues: {depth}")
+
+async def run_pipeline(changed, embeddings_model, text_splitter, workers: int,
+                       queue_size: int = QUEUE_SIZE, progress_interval: float = PROGRESS_INTERVAL,
+                       quantize: bool = False):
+    """
+    Ingests new/changed files through extract -> split -> embed -> write stages linked by
+    bounded queues. Backpressure keeps memory flat, and DB writes overlap embedding compute.
+    """
+    queues = {
+        "extracted": asyncio.Queue(maxsize=queue_size),
+        "to_embed": asyncio.Queue(maxsize=queue_size),
+        "to_write": asyncio.Queue(maxsize=queue_size),
+    }
+    stats = [
+        StageStats("extract", "files"),
+        StageStats("split", "chunks"),
+        StageStats("embed", "chunks"),
+        StageStats("write", "rows"),
+    ]
+    totals = {"inserted": 0, "deleted": 0, "kept": 0, "failed": []}
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+    stages = [
+        asyncio.create_task(extract_stage(changed, workers, queues["extracted"], stats[0], totals["failed"])),
+        asyncio.create_task(split_stage(text_splitter, queues["extracted"], queues["to_embed"], stats[1])),
+        asyncio.create_task(embed_stage(embeddings_model, executor, queues["to_embed"], queues["to_write"], stats[2])),
+        asyncio.create_task(write_stage(queues["to_write"], stats[3], totals, quantize)),
+    ]
+    reporter = asyncio.create_task(report_progress(stats, queues, progress_interval))
+    try:
+        await asyncio.gather(*stages)
+    except BaseException:
+        for task in stages:
+            task.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+        raise
+    finally:
+        reporter.cancel()
+        executor.shutdown(wait=False)
 
-async def main():
+    print("\nPipeline throughput:")
+    for stage in stats:
+        print(f"  {stage.line()}")
+    return totals
+
+async def remove_sources(sources):
+    """Deletes the chunks and manifest rows of files no longer in policies/, atomically."""
+    if not sources:
+        return 0
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            text("DELETE FROM policy_document WHERE source = ANY(CAST(:sources AS text[]))"), {"sources": sources}
+        )
+        await conn.execute(
+            text("DELETE FROM policy_source WHERE source = ANY(CAST(:sources AS text[]))"), {"sources": sources}
+        )
+    return result.rowcount
+
+async def touch_sources(touched):
+    """Records the new mtime of files whose content hash did not change."""
+    if not touched:
+        return
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("UPDATE policy_source SET size = :size, mtime = :mtime WHERE source = :source"),
+            [{"source": t["path"].name, "size": t["size"], "mtime": t["mtime"]} for t in touched],
+        )
+
+async def main(quantize: bool = False, full: bool = False, workers: int = None,
+               queue_size: int = QUEUE_SIZE, progress_interval: float = PROGRESS_INTERVAL,
+               prune: bool = False):
     if not POLICIES_DIR.exists():
         print(f"Policies directory not found: {POLICIES_DIR}")
         sys.exit(1)
 
-    policy_files = [
-        f for f in POLICIES_DIR.iterdir()
-        if f.is_file() and f.suffix.lower() in (".txt", ".pdf", ".md") and f.name != ".gitkeep"
-    ]
-
-    if not policy_files:
+    policy_files = list_policy_files()
+    if not policy_files and not prune:
+        # An empty (or unmounted) policies/ must not wipe the stored corpus by accident
         print(f"No policy documents found in '{POLICIES_DIR}'.")
-        print("Add .txt, .md, or .pdf files to the 'policies/' folder and re-run.")
+        print("Add .txt, .md, or .pdf files to the 'policies/' folder and re-run, "
+              "or pass --prune to remove every stored policy.")
         sys.exit(0)
 
-    print(f"Found {len(policy_files)} file(s) to ingest: {[f.name for f in policy_files]}")
+    # Retrieval skips chunks without compact embeddings, so keep them filled whenever used
+    quantize = quantize or settings.VECTOR_QUANTIZATION != "none"
 
     await setup_vector_extension()
     await init_db()
 
-    print("\nLoading HuggingFace Embedding Model (all-MiniLM-L6-v2)...")
-    embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    changed, touched, unchanged, removed = plan_sources(policy_files, await load_manifest(), full=full)
+    print(f"Found {len(policy_files)} policy file(s): {len(changed)} new/changed, "
+          f"{len(unchanged) + len(touched)} unchanged, {len(removed)} removed")
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=300,
-        chunk_overlap=40,
-        length_function=len,
-    )
+    totals = {"inserted": 0, "deleted": 0, "kept": 0, "failed": []}
+    if changed:
+        print(f"\nLoading embedding model (all-MiniLM-L6-v2, {settings.EMBEDDING_BACKEND} backend)...")
+        embeddings_model = load_embeddings_model()
+        text_splitter = make_text_splitter()
+        workers = workers or default_workers()
+        print(f"Ingesting {len(changed)} file(s) with {workers} extraction process(es)...")
+        totals = await run_pipeline(
+            changed, embeddings_model, text_splitter, workers,
+            queue_size=queue_size, progress_interval=progress_interval, quantize=quantize,
+        )
 
-    total_chunks = 0
-    for path in policy_files:
-        total_chunks += await ingest_file(embeddings_model, text_splitter, path)
+    await touch_sources(touched)
+    if removed:
+        deleted = await remove_sources(removed)
+        totals["deleted"] += deleted
+        print(f"\nRemoved {deleted} chunk(s) of deleted file(s): {removed}")
+
+    if quantize:
+        # halfvec / binary_quantize need pgvector >= 0.7 on the server
+        async with engine.begin() as conn:
+            updated = await populate_quantized_columns(conn)
+        print(f"Populated quantized embeddings for {updated} chunk(s).")
+
+    if totals["inserted"] or totals["deleted"]:
+        # Invalidate compliance verdicts and other caches keyed by the policy corpus
+        async with AsyncSession(engine) as session:
+            version = await bump_corpus_version(session)
+            await session.commit()
+        print(f"Policy corpus version bumped to {version}.")
+        # Publish the in-process vector snapshot so API workers only need to mmap it
+        await build_snapshot(Path(settings.VECTOR_SNAPSHOT_DIR), version)
+        print(f"Vector snapshot v{version} written to {settings.VECTOR_SNAPSHOT_DIR}.")
+    else:
+        print("\nPolicy corpus unchanged.")
 
-    print(f"\nIngestion complete! Total chunks stored: {total_chunks}")
+    print(f"\nIngestion complete! Chunks: {totals['inserted']} inserted, {totals['deleted']} deleted, "
+          f"{totals['kept']} kept from changed files.")
+    if totals["failed"]:
+        print(f"[WARNING] {len(totals['failed'])} file(s) could not be read and were left as stored: "
+              f"{sorted(totals['failed'])}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Ingest policies/ into policy_document")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Also fill the halfvec / bit embedding columns used by VECTOR_QUANTIZATION "
+                             "(implied when VECTOR_QUANTIZATION is not 'none')")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-hash and re-check every file instead of trusting size/mtime in the manifest")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF extraction processes (default: available CPU cores)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Depth of the bounded queues between pipeline stages")
+    parser.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL,
+                        help="Seconds between per-stage progress lines")
+    parser.add_argument("--prune", action="store_true",
+                        help="Proceed when policies/ is empty, removing every stored policy")
+    args = parser.parse_args()
+    asyncio.run(main(
+        quantize=args.quantize, full=args.full, workers=args.workers,
+        queue_size=args.queue_size, progress_interval=args.progress_interval,
+        prune=args.prune,
+    ))
@@ -1,19 +1,39 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.api.routes import router as citizen_router
+from app.api.routes import router as citizen_router, fail_dropped_submissions, recover_stale_submissions
 from app.api.documents import router as document_router
 from app.api.vision import router as vision_router
+from app.api.progress import router as progress_router
 from app.departments.routes import router as department_router
 from app.db.session import init_db
+from app.core.jobs import job_queue
+from app.core.ocr_events import ocr_waiters
+from app.core.progress import progress_bus
+from app.core.config import settings
+from app.core.warmup import warmup, WARMUP_LOADERS, WARMUP_OPTIONAL
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Execute database table creation
     await init_db()
+    # Settle submissions a crashed or killed process left pending/processing
+    await recover_stale_submissions()
+    # LISTEN for OCR webhook notifications delivered to other workers/nodes
+    await ocr_waiters.start_listener()
+    # Share progress events with the other workers/nodes so any of them can serve a stream
+    await progress_bus.start_fanout()
+    # Start the background workers that run queued /submit pipelines
+    await job_queue.start()
+    # Load the embedding model, LLM client and graph in the background; /ready reports progress
+    warmup.start(WARMUP_LOADERS if settings.WARMUP_ON_STARTUP else {}, optional=WARMUP_OPTIONAL)
     yield
-    # Any teardown logic goes here
+    await warmup.stop()
+    await fail_dropped_submissions(await job_queue.stop(settings.SUBMIT_DRAIN_TIMEOUT))
+    await progress_bus.stop_fanout()
+    await ocr_waiters.stop_listener()
 
 app = FastAPI(
     title="SaarthiAI Core API",
@@ -34,6 +54,7 @@ app.add_middleware(
 app.include_router(citizen_router, prefix="/api/v1")
 app.include_router(document_router, prefix="/api/v1/documents", tags=["documents"])
 app.include_router(vision_router, prefix="/api/v1/vision", tags=["vision Agent"])
+app.include_router(progress_router, prefix="/api/v1", tags=["progress"])
 
 # Connect the simulated department service routes
 app.include_router(department_router, prefix="/api/v1/departments")
@@ -41,3 +62,9 @@ app.include_router(department_router, prefix="/api/v1/departments")
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "service": "SaarthiAI"}
+
+@app.get("/ready")
+def readiness_check():
+    """200 once startup warm-up has finished; 503 while it is still running (or failed)."""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
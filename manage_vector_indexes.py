@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.core.vector_index import (
+    INDEX_METHODS, QUANTIZATIONS, vector_index_sql, drop_vector_index_sql, list_doc_types, list_vector_indexes,
+)
+
+
+async def create_indexes(method: str, per_doc_type: bool, m: int, ef_construction: int, lists: int,
+                         quantization: str):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+
+        targets = [None]
+        if per_doc_type:
+            targets += await list_doc_types(conn)
+
+        for doc_type in targets:
+            label = f"doc_type={doc_type}" if doc_type else "all rows"
+            print(f"Building {method} index on {QUANTIZATIONS[quantization][0]} ({label})...")
+            await conn.execute(text(vector_index_sql(
+                method=method, doc_type=doc_type, m=m, ef_construction=ef_construction, lists=lists,
+                quantization=quantization,
+            )))
+
+        if method == "ivfflat":
+            # IVFFlat centroids are fixed at build time; rebuild after large ingests.
+            print("Note: rebuild ivfflat indexes after large ingests so the lists stay balanced.")
+
+        await conn.execute(text("ANALYZE policy_document;"))
+
+
+async def drop_indexes(method: str, per_doc_type: bool, quantization: str):
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        targets = [None]
+        if per_doc_type:
+            targets += await list_doc_types(conn)
+        for doc_type in targets:
+            await conn.execute(text(drop_vector_index_sql(
+                method=method, doc_type=doc_type, quantization=quantization,
+            )))
+            print(f"Dropped {method} index ({doc_type or 'all rows'}).")
+
+
+async def show_indexes():
+    async with engine.connect() as conn:
+        indexes = await list_vector_indexes(conn)
+    if not indexes:
+        print("No vector indexes on policy_document.")
+    for idx in indexes:
+        print(f"{idx['name']}\n    {idx['definition']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage ANN indexes on policy_document.embedding")
+    parser.add_argument("action", choices=["create", "drop", "list"])
+    parser.add_argument("--method", choices=INDEX_METHODS, default="hnsw")
+    parser.add_argument("--per-doc-type", action="store_true",
+                        help="Also build a partial index for each doc_type present in policy_document")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW build-time candidate list size")
+    parser.add_argument("--lists", type=int, default=100, help="IVFFlat number of lists")
+    parser.add_argument("--quantization", choices=list(QUANTIZATIONS), default="none",
+                        help="Index the halfvec / bit column instead of the float32 embedding")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        asyncio.run(create_indexes(
+            args.method, args.per_doc_type, args.m, args.ef_construction, args.lists, args.quantization,
+        ))
+    elif args.action == "drop":
+        asyncio.run(drop_indexes(args.method, args.per_doc_type, args.quantization))
+    else:
+        asyncio.run(show_indexes())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Add policy_corpus_version and compliance_cache tables
+
+Revision ID: a3c7e9f1b2d4
+Revises: f2b6d8e4a913
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e9f1b2d4'
+down_revision: Union[str, Sequence[str], None] = 'f2b6d8e4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('policy_corpus_version'):
+        op.create_table('policy_corpus_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    # Single row read by app.core.corpus; version 0 until the next ingestion bumps it
+    op.execute("""
+        INSERT INTO policy_corpus_version (id, version)
+        VALUES (1, 0)
+        ON CONFLICT (id) DO NOTHING
+    """)
+
+    if not inspector.has_table('compliance_cache'):
+        op.create_table('compliance_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('requirement_name', sa.String(length=100), nullable=False),
+        sa.Column('scheme_id', sa.String(length=50), nullable=True),
+        sa.Column('model_name', sa.String(length=100), nullable=False),
+        sa.Column('corpus_version', sa.Integer(), nullable=False),
+        sa.Column('verdict_json', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('cache_key')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('compliance_cache')
+    op.drop_table('policy_corpus_version')
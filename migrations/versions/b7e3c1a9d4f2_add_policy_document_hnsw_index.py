@@ -0,0 +1,34 @@
+"""Add HNSW index on policy_document.embedding
+
+Revision ID: b7e3c1a9d4f2
+Revises: 4ca50de56068
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.vector_index import vector_index_sql, drop_vector_index_sql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c1a9d4f2'
+down_revision: Union[str, Sequence[str], None] = '4ca50de56068'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    # CREATE INDEX CONCURRENTLY must run outside the migration transaction.
+    # Per-doc_type partial indexes depend on ingested data: see manage_vector_indexes.py.
+    with op.get_context().autocommit_block():
+        op.execute(vector_index_sql(method="hnsw"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(drop_vector_index_sql(method="hnsw"))
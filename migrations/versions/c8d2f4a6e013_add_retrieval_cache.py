@@ -0,0 +1,38 @@
+"""Add retrieval_cache table
+
+Revision ID: c8d2f4a6e013
+Revises: a3c7e9f1b2d4
+Create Date: 2026-10-17 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2f4a6e013'
+down_revision: Union[str, Sequence[str], None] = 'a3c7e9f1b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('retrieval_cache'):
+        return
+    op.create_table('retrieval_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('corpus_version', sa.Integer(), nullable=False),
+    sa.Column('context', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_retrieval_cache_corpus_version'), 'retrieval_cache', ['corpus_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_retrieval_cache_corpus_version'), table_name='retrieval_cache')
+    op.drop_table('retrieval_cache')
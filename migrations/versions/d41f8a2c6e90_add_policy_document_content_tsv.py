@@ -0,0 +1,43 @@
+"""Add full-text search column to policy_document
+
+Revision ID: d41f8a2c6e90
+Revises: b7e3c1a9d4f2
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8a2c6e90'
+down_revision: Union[str, Sequence[str], None] = 'b7e3c1a9d4f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db()'s create_all may already have created the column on a fresh database
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('policy_document')}
+    if 'content_tsv' not in columns:
+        op.add_column('policy_document', sa.Column(
+            'content_tsv', postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True
+        ))
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_policy_document_content_tsv "
+            "ON policy_document USING gin (content_tsv)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_policy_document_content_tsv")
+    op.drop_column('policy_document', 'content_tsv')
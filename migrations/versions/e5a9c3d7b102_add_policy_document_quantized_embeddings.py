@@ -0,0 +1,35 @@
+"""Add quantized embedding columns to policy_document
+
+Revision ID: e5a9c3d7b102
+Revises: d41f8a2c6e90
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3d7b102'
+down_revision: Union[str, Sequence[str], None] = 'd41f8a2c6e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db()'s create_all may already have created the columns on a fresh database
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('policy_document')}
+    if 'embedding_half' not in columns:
+        op.add_column('policy_document', sa.Column('embedding_half', pgvector.sqlalchemy.HALFVEC(dim=384), nullable=True))
+    if 'embedding_bit' not in columns:
+        op.add_column('policy_document', sa.Column('embedding_bit', pgvector.sqlalchemy.BIT(length=384), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('policy_document', 'embedding_bit')
+    op.drop_column('policy_document', 'embedding_half')
@@ -0,0 +1,76 @@
+"""Add policy_source manifest and content-hashed policy chunks
+
+Revision ID: f2b6d8e4a913
+Revises: e5a9c3d7b102
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8e4a913'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3d7b102'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('policy_source'):
+        op.create_table('policy_source',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('source', sa.String(length=255), nullable=False),
+        sa.Column('doc_type', sa.String(length=50), nullable=True),
+        sa.Column('file_hash', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('mtime', sa.Float(), nullable=False),
+        sa.Column('chunk_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source')
+        )
+
+    # init_db()'s create_all may already have created the columns and indexes on a fresh database
+    columns = {c['name'] for c in inspector.get_columns('policy_document')}
+    indexes = {i['name'] for i in inspector.get_indexes('policy_document')}
+    if 'source' not in columns:
+        op.add_column('policy_document', sa.Column('source', sa.String(length=255), nullable=True))
+    if 'content_hash' not in columns:
+        op.add_column('policy_document', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # Backfill chunks ingested before the manifest existed, then drop the duplicates
+    # that repeated ingestion runs inserted.
+    op.execute("""
+        UPDATE policy_document
+        SET source = CAST(metadata_json AS json)->>'source',
+            content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+        WHERE content_hash IS NULL
+    """)
+    op.execute("""
+        DELETE FROM policy_document p
+        USING policy_document keep
+        WHERE p.source IS NOT DISTINCT FROM keep.source
+          AND p.content_hash = keep.content_hash
+          AND p.id > keep.id
+    """)
+
+    if 'ix_policy_document_source' not in indexes:
+        op.create_index('ix_policy_document_source', 'policy_document', ['source'])
+    if 'uq_policy_document_source_content_hash' not in indexes:
+        op.create_index(
+            'uq_policy_document_source_content_hash', 'policy_document', ['source', 'content_hash'], unique=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_policy_document_source_content_hash', table_name='policy_document')
+    op.drop_index('ix_policy_document_source', table_name='policy_document')
+    op.drop_column('policy_document', 'content_hash')
+    op.drop_column('policy_document', 'source')
+    op.drop_table('policy_source')
@@ -187,12 +187,38 @@ async def delete_document_type_api(dt_id: int):
     except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout):
         return False
 
+TRACKING_POLL_INTERVAL = 2
+TRACKING_POLL_TIMEOUT = 600
+
 async def submit_document_request(aadhar_number, document_request_type):
     try:
-        async with httpx.AsyncClient(timeout=60.0) as c:
+        async with httpx.AsyncClient(timeout=10.0) as c:
             r = await c.post(f"{API_BASE}/api/v1/submit",
                 json={"aadhar_number": aadhar_number, "document_request_type": document_request_type})
-            return r.json() if r.status_code == 200 else {"error": r.text, "status": "error"}
+            if r.status_code not in (200, 202):
+                return {"error": r.text, "status": "error"}
+            submitted = r.json()
+            tracking_id = submitted.get("tracking_id")
+
+            elapsed = 0
+            while elapsed < TRACKING_POLL_TIMEOUT:
+                t = await c.get(f"{API_BASE}/api/v1/tracking/{tracking_id}")
+                if t.status_code == 200:
+                    record = t.json()
+                    if record["status"] == "failed":
+                        return {"error": record.get("remarks") or "Processing failed.", "status": "error",
+                                "tracking_id": tracking_id}
+                    if record["status"] not in ("pending", "processing"):
+                        return {
+                            "tracking_id": tracking_id,
+                            "status": record["status"],
+                            "message": "Document request submitted and processed successfully.",
+                            "compliance_report": record.get("compliance_report") or {},
+                        }
+                await asyncio.sleep(TRACKING_POLL_INTERVAL)
+                elapsed += TRACKING_POLL_INTERVAL
+            return {"error": f"Tracking #{tracking_id} is still processing.", "status": "error",
+                    "tracking_id": tracking_id}
     except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout):
         return {"error": BACKEND_UNREACHABLE_MSG, "status": "error"}
 